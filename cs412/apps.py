@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class Cs412Config(AppConfig):
+    '''
+    The project package as an app, so the management commands shared by
+    voter_analytics and marathon_analytics live beside cs412.importing.
+    '''
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'cs412'
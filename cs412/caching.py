@@ -0,0 +1,87 @@
+# file: cs412/caching.py
+# author: Cody Headings, codyh@bu.edu, 11/02/2025
+# desc: versioned cache keys that are invalidated when a table is written
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_delete, post_save
+
+
+def _version_key(table):
+    return f'data-version:{table}'
+
+
+def table_name(model_or_table):
+    '''Return the database table for a model class, or a table name unchanged.'''
+    if isinstance(model_or_table, str):
+        return model_or_table
+    return model_or_table._meta.db_table
+
+
+def data_version(*models):
+    '''
+    Return a token that changes whenever one of the given models (or
+    table names) is invalidated. Use it as part of a cache key.
+
+    The tokens are kept in the default cache, so it must be shared by
+    every process (see CACHES in settings) for an invalidate() in a
+    manage.py command to reach the web server.
+    '''
+    keys = [_version_key(table_name(m)) for m in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # a fresh token, so entries cached under an evicted version can never match
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def is_shared(backend):
+    '''Return False for cache backends that only the current process can see.'''
+    return not isinstance(backend, (LocMemCache, DummyCache))
+
+
+def invalidate(*models):
+    '''Mark the given models (or table names) as changed.'''
+    cache.set_many({_version_key(table_name(m)): time.time_ns() for m in models}, None)
+
+
+def versioned_key(prefix, signature, *models):
+    '''Return a cache key for signature that expires when any of models is written.'''
+    digest = hashlib.sha1(f'{signature}|{data_version(*models)}'.encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def cached(prefix, signature, versions, compute, ttl):
+    '''
+    Return compute(), cached for ttl seconds under a versioned_key() that
+    expires as soon as one of versions (models or table names) is
+    invalidated. None is never cached.
+    '''
+    key = versioned_key(prefix, signature, *versions)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, ttl)
+    return value
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate(sender)
+
+
+def track_writes(*models):
+    '''
+    Invalidate a model's cache version on every save or delete. Only use
+    this for models written one row at a time; bulk loaders should call
+    invalidate() themselves.
+    '''
+    for model in models:
+        post_save.connect(_invalidate_sender, sender=model, weak=False)
+        post_delete.connect(_invalidate_sender, sender=model, weak=False)
@@ -0,0 +1,72 @@
+# file: cs412/charts.py
+# author: Cody Headings, codyh@bu.edu, 11/04/2025
+# desc: plotly figure rendering shared by the analytics apps
+
+from functools import lru_cache
+
+import plotly
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
+
+from .caching import is_shared, versioned_key
+
+# seconds a rendered figure stays cached
+CHART_CACHE_TTL = getattr(settings, 'CHART_CACHE_TTL', 3600)
+
+# URL path of the plotly.js bundle; it changes with the plotly version
+PLOTLY_JS_PATH = f'plotly-{plotly.__version__}.min.js'
+
+
+def chart_cache():
+    '''Return the cache for rendered figures (its own bounded cache if configured).'''
+    if 'charts' in settings.CACHES:
+        return caches['charts']
+    return caches['default']
+
+
+def chart_cache_is_shared():
+    '''
+    Return True if figures cached by this process reach every other one:
+    the chart cache and the default cache holding the version tokens in
+    their keys must both be shared.
+    '''
+    return is_shared(chart_cache()) and is_shared(caches['default'])
+
+
+def render_figure(figure):
+    '''
+    Return the HTML div for a plotly figure dict. Only the figure JSON is
+    embedded; pages load plotly.js once from plotly_js().
+    '''
+    return plotly.offline.plot(figure, auto_open=False, output_type='div',
+                               include_plotlyjs=False)
+
+
+def cached_figure(name, signature, models, build):
+    '''
+    Return render_figure(build()), cached under the chart name and
+    signature (e.g. the filters or pk it was drawn for) until one of
+    models is invalidated.
+    '''
+    key = versioned_key(f'chart:{name}', signature, *models)
+    cache = chart_cache()
+    html = cache.get(key)
+    if html is None:
+        html = render_figure(build())
+        cache.set(key, html, CHART_CACHE_TTL)
+    return html
+
+
+@lru_cache(maxsize=1)
+def _plotly_js():
+    return plotly.offline.get_plotlyjs()
+
+
+@etag(lambda request: plotly.__version__)
+@cache_control(public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+def plotly_js(request):
+    '''Serve the plotly.js bundle as a long-lived cacheable asset.'''
+    return HttpResponse(_plotly_js(), content_type='application/javascript')
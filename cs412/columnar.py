@@ -0,0 +1,186 @@
+# file: cs412/columnar.py
+# author: Cody Headings, codyh@bu.edu, 11/09/2025
+# desc: Parquet and Arrow IPC import/export for the registered import targets
+
+import os
+
+from django.db import models
+
+from .importing import DEFAULT_BATCH_SIZE, ImportStats, get_target, write_batches
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar files are optional; CSV import still works
+    pa = pq = None
+
+# rows per Parquet row group / Arrow record batch when exporting
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+# file extensions of each format
+FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+class ColumnarError(Exception):
+    '''A columnar file cannot be read or written.'''
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ColumnarError('Parquet/Arrow support needs pyarrow: pip install pyarrow')
+
+
+def file_format(path, fmt=None):
+    '''Return 'parquet' or 'arrow' for a file, from fmt or else its extension.'''
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ('parquet', 'arrow'):
+        raise ColumnarError(f'Cannot tell the format of {path}; use .parquet or .arrow')
+    return fmt
+
+
+def model_columns(model):
+    '''Return the concrete fields of a model stored as columns, except the primary key.'''
+    return [f for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def arrow_type(field):
+    '''Return the Arrow type for a model field.'''
+    if isinstance(field, models.ForeignKey):
+        return arrow_type(field.target_field)
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, (models.BigIntegerField, models.AutoField)):
+        return pa.int64()
+    if isinstance(field, models.IntegerField):
+        return pa.int32()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pa.date32()
+    if isinstance(field, models.TimeField):
+        return pa.time64('us')
+    if isinstance(field, models.BinaryField):
+        return pa.binary()
+    if isinstance(field, (models.CharField, models.TextField)):
+        return pa.string()
+    raise ColumnarError(f'No Arrow type for {field.__class__.__name__} {field.name}')
+
+
+def export_columnar(name, path, fmt=None, row_group_size=DEFAULT_ROW_GROUP_SIZE, scope=None):
+    '''
+    Write every row of the named import target to a Parquet or Arrow IPC
+    file, one row group (record batch) of row_group_size rows at a time,
+    so memory use does not grow with the table. A scoped target exports
+    one partition, given by scope as for import_columnar(), so the file
+    can be loaded back into it. Returns the row count.
+    '''
+    require_pyarrow()
+    target = get_target(name)
+    scope = target.check_scope(scope)
+    model = target.model
+    fmt = file_format(path, fmt)
+    fields = model_columns(model)
+    schema = pa.schema([pa.field(f.attname, arrow_type(f), nullable=f.null) for f in fields])
+
+    rows = (model.objects.filter(**scope).order_by('pk')
+            .values_list(*[f.attname for f in fields])
+            .iterator(chunk_size=min(row_group_size, 10_000)))
+
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    count = 0
+    with writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= row_group_size:
+                writer.write_batch(_record_batch(schema, chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk or count == 0:
+            writer.write_batch(_record_batch(schema, chunk))
+            count += len(chunk)
+    return count
+
+
+def _record_batch(schema, rows):
+    '''Turn a list of value tuples into a RecordBatch, column by column.'''
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.record_batch([pa.array(column, type=field.type)
+                            for column, field in zip(columns, schema)], schema=schema)
+
+
+def import_columnar(name, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, scope=None):
+    '''
+    Replace the named import target's rows with a Parquet or Arrow IPC
+    file. The file is memory-mapped and only the columns the model has
+    are read; batches go through the same writer as the CSV pipeline.
+    scope works as for parallel_import() and overrides those columns.
+    Returns an ImportStats describing the run.
+    '''
+    require_pyarrow()
+    target = get_target(name)
+    scope = target.check_scope(scope)
+    fmt = file_format(path, fmt)
+    scoped = {target.model._meta.get_field(f).attname for f in scope}
+    fields = [f for f in model_columns(target.model) if f.attname not in scoped]
+    wanted = {f.attname for f in fields}
+
+    if fmt == 'parquet':
+        source = pq.ParquetFile(path, memory_map=True)
+        names = source.schema_arrow.names
+    else:
+        source = pa.ipc.open_file(pa.memory_map(path))
+        names = source.schema.names
+    columns = [n for n in names if n in wanted]
+
+    missing = [f.attname for f in fields if f.attname not in columns
+               and not (f.null or f.blank or f.has_default())]
+    if missing:
+        raise ColumnarError(f'{path} has no {", ".join(missing)} column')
+
+    if fmt == 'parquet':
+        batches = source.iter_batches(batch_size=batch_size, columns=columns)
+    else:
+        batches = (source.get_batch(i).select(columns) for i in range(source.num_record_batches))
+
+    stats = ImportStats(target.label)
+    stats.deleted = target.before(**scope)
+    required = [f.attname for f in fields if f.attname in columns and not f.null]
+    write_batches(target, _parse_batches(target, batches, required), stats, batch_size,
+                  line_base=0, scope=scope)
+    target.after(**scope)
+    stats.finish()
+    return stats
+
+
+def _parse_batches(target, batches, required):
+    '''
+    Yield each record batch as model instances in the form write_batches()
+    expects; the "line" of a row is its 1-based row number in the batch.
+    '''
+    for batch in batches:
+        instances = []
+        rows = []
+        rejects = []
+        for n, record in enumerate(batch.to_pylist(), start=1):
+            try:
+                empty = [name for name in required if record[name] is None]
+                if empty:
+                    raise ValueError(f'missing {", ".join(empty)}')
+                instances.append(target.from_record(record))
+                rows.append(n)
+            except (ValueError, TypeError) as e:
+                rejects.append((n, str(e)))
+        yield instances, rows, rejects, batch.num_rows
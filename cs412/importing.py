@@ -0,0 +1,274 @@
+# file: cs412/importing.py
+# author: Cody Headings, codyh@bu.edu, 11/08/2025
+# desc: parallel CSV import pipeline shared by the analytics apps
+
+import csv
+import io
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+
+DEFAULT_BATCH_SIZE = 5000
+
+# bytes of CSV handed to a worker at a time
+DEFAULT_CHUNK_BYTES = 8 * 1024 * 1024
+
+# number of rejected rows to keep for the end-of-run report
+MAX_REJECTS_REPORTED = 10
+
+
+class ImportStats:
+    '''Counters collected while importing a file.'''
+
+    def __init__(self, label='rows'):
+        self.label = label
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.rejected = 0
+        self.rejects = []   # (line number, reason) for the first few rejects
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_number, reason):
+        '''Record a row that could not be imported.'''
+        self.rejected += 1
+        if len(self.rejects) < MAX_REJECTS_REPORTED:
+            self.rejects.append((line_number, reason))
+
+    def finish(self):
+        '''Stop the clock.'''
+        self.elapsed = time.perf_counter() - self.started
+
+    def rate(self):
+        '''Return the import throughput in rows per second.'''
+        if self.elapsed <= 0:
+            return 0.0
+        rows = self.inserted + self.updated + self.unchanged + self.rejected
+        return rows / self.elapsed
+
+    def summary(self):
+        '''Return a multi-line report of this import.'''
+        lines = [f'Inserted {self.inserted}, updated {self.updated}, '
+                 f'deleted {self.deleted}, unchanged {self.unchanged} {self.label} '
+                 f'in {self.elapsed:.2f}s ({self.rate():,.0f} rows/s); '
+                 f'rejected {self.rejected} rows.']
+        for line_number, reason in self.rejects:
+            lines.append(f'  line {line_number}: {reason}')
+        if self.rejected > len(self.rejects):
+            lines.append(f'  ... and {self.rejected - len(self.rejects)} more')
+        return '\n'.join(lines)
+
+
+class ImportTarget:
+    '''
+    A model that can be loaded by parallel_import(). parse_row turns the
+    fields of one CSV row into an unsaved instance, raising ValueError or
+    IndexError for a bad row; it runs in the worker processes. Rows whose
+    unique_field repeats an earlier row are rejected. before() runs ahead
+    of the load and returns the number of rows it deleted; after() runs
+    once every batch is written. from_record builds an instance from a
+    dict of typed column values (see cs412.columnar).
+
+    scope_fields names the fields that partition the table, e.g. a
+    race. Each load then gives them values (its scope): they are set on
+    every instance and passed to before() and after() as keyword
+    arguments, so one partition can be replaced without touching others.
+    scope_lookup(field, text) turns a value given on the command line
+    (e.g. a race slug) into the value of a scope field, raising
+    ValueError if there is none.
+    '''
+
+    def __init__(self, name, model, parse_row, label, unique_field=None,
+                 before=None, after=None, from_record=None, scope_fields=(), scope_lookup=None):
+        self.name = name
+        self.model = model
+        self.parse_row = parse_row
+        self.label = label
+        self.unique_field = unique_field
+        self.before = before or (lambda: 0)
+        self.after = after or (lambda: None)
+        self.from_record = from_record or (lambda record: model(**record))
+        self.scope_fields = tuple(scope_fields)
+        self.scope_lookup = scope_lookup or (lambda field, text: text)
+
+    def check_scope(self, scope):
+        '''Return scope (a dict of field values) or raise ValueError if it does not fit this target.'''
+        scope = scope or {}
+        if set(scope) != set(self.scope_fields):
+            fields = ', '.join(self.scope_fields) or 'no fields'
+            raise ValueError(f'the {self.name} target is scoped by {fields}')
+        return scope
+
+    def parse_scope(self, options):
+        '''
+        Return the scope given by command-line options ({field: text or
+        None}), looking each value up, or raise ValueError if it does
+        not fit this target.
+        '''
+        scope = {field: self.scope_lookup(field, text)
+                 for field, text in options.items() if text is not None}
+        return self.check_scope(scope)
+
+
+_targets = {}
+
+
+def register(target):
+    '''Make an ImportTarget available to parallel_import() under its name.'''
+    _targets[target.name] = target
+
+
+def get_target(name):
+    '''Return the registered ImportTarget called name, or raise KeyError.'''
+    return _targets[name]
+
+
+def target_names():
+    return sorted(_targets)
+
+
+def scope_field_names():
+    '''Return the scope fields of every registered target, e.g. to offer as command options.'''
+    return sorted({field for target in _targets.values() for field in target.scope_fields})
+
+
+def byte_ranges(filename, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    '''
+    Split a CSV file after its header line into (start, end) byte ranges
+    of about chunk_bytes each, every one starting at the beginning of a
+    line. Quoted fields must not contain line breaks.
+    '''
+    size = os.path.getsize(filename)
+    ranges = []
+    with open(filename, 'rb') as f:
+        f.readline()  # discard headers
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # move to the start of the next line
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(name, filename, start, end):
+    '''
+    Parse the rows in one byte range of a file with the named target's
+    parse_row. Returns (instances, their line offsets, rejects as
+    (line offset, reason), number of lines read); offsets count from 1
+    at the start of the range.
+    '''
+    target = get_target(name)
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+
+    instances = []
+    lines = []
+    rejects = []
+    reader = csv.reader(io.StringIO(text, newline=''))
+    for fields in reader:
+        try:
+            instances.append(target.parse_row(fields))
+            lines.append(reader.line_num)
+        except (ValueError, IndexError) as e:
+            rejects.append((reader.line_num, str(e)))
+    return instances, lines, rejects, reader.line_num
+
+
+def _setup_worker():
+    '''Initialize Django in a freshly spawned worker so the targets are registered.'''
+    import django
+    django.setup()
+
+
+def parallel_import(name, filename, workers=None, batch_size=DEFAULT_BATCH_SIZE,
+                    chunk_bytes=DEFAULT_CHUNK_BYTES, scope=None):
+    '''
+    Replace the named target's rows with the contents of a CSV file.
+    Byte ranges of the file are parsed by a pool of worker processes
+    while this process, the only one that touches the database, writes
+    the parsed batches in file order. workers=1 parses in this process.
+    scope gives the target's scope_fields values for this load. Returns an
+    ImportStats describing the run.
+    '''
+    target = get_target(name)
+    scope = target.check_scope(scope)
+    stats = ImportStats(target.label)
+    workers = workers or os.cpu_count() or 1
+    ranges = byte_ranges(filename, chunk_bytes)
+
+    stats.deleted = target.before(**scope)
+
+    if workers == 1:
+        results = (parse_range(name, filename, start, end) for start, end in ranges)
+        write_batches(target, results, stats, batch_size, scope=scope)
+    else:
+        # spawn rather than fork, so no worker inherits a database connection
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_setup_worker) as pool:
+            write_batches(target, _ordered(pool, name, filename, ranges, workers * 2), stats,
+                          batch_size, scope=scope)
+
+    target.after(**scope)
+    stats.finish()
+    return stats
+
+
+def _ordered(pool, name, filename, ranges, window):
+    '''
+    Yield parse_range() results in file order, keeping at most window
+    ranges in flight so memory stays bounded however large the file is.
+    '''
+    pending = deque()
+    ranges = iter(ranges)
+    for start, end in ranges:
+        pending.append(pool.submit(parse_range, name, filename, start, end))
+        if len(pending) >= window:
+            break
+    while pending:
+        result = pending.popleft().result()
+        for start, end in ranges:
+            pending.append(pool.submit(parse_range, name, filename, start, end))
+            break
+        yield result
+
+
+def write_batches(target, results, stats, batch_size, line_base=1, scope=None):
+    '''
+    Write parsed ranges with bulk_create, one transaction per range.
+    line_base is the number of lines before the first range (the header);
+    scope holds field values set on every instance before it is written.
+    '''
+    scope = scope or {}
+    seen = set()
+    for instances, lines, rejects, line_count in results:
+        for offset, reason in rejects:
+            stats.reject(line_base + offset, reason)
+
+        if target.unique_field:
+            unique = []
+            for instance, offset in zip(instances, lines):
+                key = getattr(instance, target.unique_field)
+                if key in seen:
+                    stats.reject(line_base + offset, f'duplicate {target.unique_field} {key}')
+                    continue
+                seen.add(key)
+                unique.append(instance)
+            instances = unique
+
+        for instance in instances:
+            for field, value in scope.items():
+                setattr(instance, field, value)
+
+        with transaction.atomic():
+            target.model.objects.bulk_create(instances, batch_size=batch_size)
+        stats.inserted += len(instances)
+        line_base += line_count
@@ -0,0 +1,41 @@
+# file: cs412/management/commands/export_columnar.py
+# author: Cody Headings, codyh@bu.edu, 11/09/2025
+# desc: manage.py command to export voters or marathon results to Parquet/Arrow
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.columnar import DEFAULT_ROW_GROUP_SIZE, ColumnarError, export_columnar
+from cs412.importing import get_target, scope_field_names, target_names
+
+
+class Command(BaseCommand):
+    help = ('Write every voter, or the marathon results of one --race, to a Parquet (.parquet) '
+            'or Arrow IPC (.arrow) file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=target_names(), help='what to export')
+        parser.add_argument('filename', help='path of the file to write')
+        for field in scope_field_names():
+            parser.add_argument(f'--{field}', help=f'the {field} to export, for targets partitioned by it')
+        parser.add_argument('--format', choices=['parquet', 'arrow'],
+                            help='file format (default: from the file extension)')
+        parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                            help=f'rows per row group / record batch (default {DEFAULT_ROW_GROUP_SIZE})')
+
+    def handle(self, *args, **options):
+        if options['row_group_size'] < 1:
+            raise CommandError('--row-group-size must be at least 1')
+
+        try:
+            scope = get_target(options['target']).parse_scope(
+                {field: options[field] for field in scope_field_names()})
+            count = export_columnar(options['target'], options['filename'], options['format'],
+                                    options['row_group_size'], scope=scope)
+        except ColumnarError as e:
+            raise CommandError(str(e))
+        except ValueError as e:  # e.g. a partitioned target without its --race
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(f'Could not write {options["filename"]}: {e}')
+
+        self.stdout.write(f'Wrote {count} rows to {options["filename"]}.')
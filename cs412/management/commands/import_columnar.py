@@ -0,0 +1,41 @@
+# file: cs412/management/commands/import_columnar.py
+# author: Cody Headings, codyh@bu.edu, 11/09/2025
+# desc: manage.py command to load voters or marathon results from Parquet/Arrow
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.columnar import ColumnarError, import_columnar
+from cs412.importing import DEFAULT_BATCH_SIZE, get_target, scope_field_names, target_names
+
+
+class Command(BaseCommand):
+    help = ('Replace the voters, or the marathon results of one --race, with a Parquet (.parquet) '
+            'or Arrow IPC (.arrow) file.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=target_names(), help='what the file contains')
+        parser.add_argument('filename', help='path to the Parquet or Arrow file')
+        for field in scope_field_names():
+            parser.add_argument(f'--{field}', help=f'the {field} to load, for targets partitioned by it')
+        parser.add_argument('--format', choices=['parquet', 'arrow'],
+                            help='file format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'rows read and inserted at a time (default {DEFAULT_BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        try:
+            scope = get_target(options['target']).parse_scope(
+                {field: options[field] for field in scope_field_names()})
+            stats = import_columnar(options['target'], options['filename'], options['format'],
+                                    options['batch_size'], scope=scope)
+        except ColumnarError as e:
+            raise CommandError(str(e))
+        except ValueError as e:  # e.g. a partitioned target without its --race
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(f'Could not read {options["filename"]}: {e}')
+
+        self.stdout.write(stats.summary())
@@ -0,0 +1,48 @@
+# file: cs412/management/commands/parallel_import.py
+# author: Cody Headings, codyh@bu.edu, 11/08/2025
+# desc: manage.py command to load a large CSV file with a pool of parser processes
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.importing import (DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_BYTES, get_target,
+                             parallel_import, scope_field_names, target_names)
+
+
+class Command(BaseCommand):
+    help = ('Replace the rows of a model (the voters, or the marathon results of one --race) '
+            'with a CSV file, parsing it in parallel on every core.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=target_names(), help='what the file contains')
+        parser.add_argument('filename', help='path to the CSV file')
+        for field in scope_field_names():
+            parser.add_argument(f'--{field}', help=f'the {field} to load, for targets partitioned by it')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='parser processes (default: one per CPU; 1 parses in-process)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'rows per bulk insert (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_BYTES / 2**20,
+                            help='megabytes of CSV per parser task (default %(default)s)')
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['chunk_mb'] <= 0:
+            raise CommandError('--chunk-mb must be positive')
+
+        try:
+            scope = get_target(options['target']).parse_scope(
+                {field: options[field] for field in scope_field_names()})
+            stats = parallel_import(options['target'], options['filename'],
+                                    workers=options['workers'],
+                                    batch_size=options['batch_size'],
+                                    chunk_bytes=int(options['chunk_mb'] * 2**20),
+                                    scope=scope)
+        except ValueError as e:  # e.g. a partitioned target without its --race
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(f'Could not read {options["filename"]}: {e}')
+
+        self.stdout.write(stats.summary())
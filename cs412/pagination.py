@@ -0,0 +1,205 @@
+# file: cs412/pagination.py
+# author: Cody Headings, codyh@bu.edu, 11/01/2025
+# desc: pagination helpers shared by the list views of several apps
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .caching import versioned_key
+
+# seconds an exact count stays cached
+COUNT_CACHE_TTL = getattr(settings, 'PAGINATION_COUNT_TTL', 300)
+
+# unfiltered tables with more rows than this show an estimated count
+ESTIMATE_THRESHOLD = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 100_000)
+
+
+def estimate_count(model, using='default'):
+    '''
+    Return a cheap estimate of the number of rows in a model's table,
+    or None if the database cannot provide one.
+    '''
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        elif connection.vendor == 'sqlite':
+            # two index probes on the integer primary key
+            pk = connection.ops.quote_name(model._meta.pk.column)
+            cursor.execute(f'SELECT MAX({pk}) - MIN({pk}) + 1 FROM {connection.ops.quote_name(table)}')
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    '''
+    A Paginator that caches the total count per query signature, and
+    estimates it for large unfiltered tables instead of running COUNT(*).
+    Cached counts expire after COUNT_CACHE_TTL seconds or as soon as one of
+    the tables in the query is invalidated (see cs412.caching). Pass
+    versions to expire them on other tables or tags instead, e.g. the one
+    partition of a table that the query reads.
+    '''
+
+    def __init__(self, object_list, per_page, *args, versions=None, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.versions = versions
+
+    @cached_property
+    def count(self):
+        '''Return the total number of objects, from the cache when possible.'''
+        qs = self.object_list
+        if not hasattr(qs, 'query'):
+            return super().count
+
+        query = qs.query
+        if query.is_empty():  # e.g. qs.none(), which has no SQL to key on
+            return 0
+        tables = {alias.table_name for alias in query.alias_map.values()}
+        tables = sorted(tables | {qs.model._meta.db_table})
+        key = versioned_key('count', f'{qs.db}|{query}', *(self.versions or tables))
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+        self.estimated = False
+        if not query.where and len(tables) == 1 and not query.distinct:
+            estimate = estimate_count(qs.model, qs.db)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                self.estimated = True
+                return estimate
+
+        count = super().count
+        cache.set(key, count, COUNT_CACHE_TTL)
+        return count
+
+    # set by count when the total is an estimate
+    estimated = False
+
+
+class KeysetPage:
+    '''
+    One page of a keyset (seek) paginated queryset. Unlike Django's Page
+    it has no total page count; it links to its neighbours with opaque
+    cursors instead of page numbers.
+    '''
+
+    def __init__(self, object_list, number, has_next, has_previous,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    '''
+    Paginate a queryset by seeking past the last row of the previous page
+    on a unique ordering, e.g. ('dob', 'id'), instead of using OFFSET.
+    Every page costs one indexed range scan of per_page + 1 rows, however
+    deep it is, and no COUNT(*) is issued.
+    '''
+
+    estimated = False
+
+    def __init__(self, queryset, per_page, ordering=('id',), count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        # the paginator never counts rows itself; a known total may be passed in
+        self.count = count
+        self.num_pages = None if count is None else max(1, -(-count // per_page))
+        self.ordering = tuple(ordering)
+        self.fields = [queryset.model._meta.get_field(name) for name in self.ordering]
+
+    def encode_cursor(self, obj, direction, number):
+        '''Return an opaque cursor pointing just past (or before) obj.'''
+        values = [field.value_to_string(obj) for field in self.fields]
+        data = json.dumps([direction, number, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        '''Return (direction, page number, key values) for a cursor, or raise Http404.'''
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, number, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ('next', 'prev') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            values = [field.to_python(value) for field, value in zip(self.fields, values)]
+            return direction, int(number), values
+        except Exception:
+            raise Http404('Invalid cursor.')
+
+    def seek(self, values, forward):
+        '''Return a Q selecting rows after (forward) or before the given key.'''
+        op = 'gt' if forward else 'lt'
+        seek = Q()
+        for i, name in enumerate(self.ordering):
+            equal = {self.ordering[j]: values[j] for j in range(i)}
+            seek |= Q(**equal, **{f'{name}__{op}': values[i]})
+        # bound the leading column too, so the database can range-scan its index
+        return Q(**{f'{self.ordering[0]}__{op}e': values[0]}) & seek
+
+    def page(self, cursor=None):
+        '''Return the KeysetPage addressed by cursor (the first page if None).'''
+        if not cursor:
+            direction, number, values = 'next', 1, None
+        else:
+            direction, number, values = self.decode_cursor(cursor)
+
+        forward = direction == 'next'
+        qs = self.queryset
+        if values is not None:
+            qs = qs.filter(self.seek(values, forward))
+        order = self.ordering if forward else [f'-{name}' for name in self.ordering]
+        rows = list(qs.order_by(*order)[:self.per_page + 1])
+
+        # the extra row tells us whether there is more in the direction travelled
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = more, values is not None
+        else:
+            has_next, has_previous = True, more
+
+        return KeysetPage(
+            rows, number, has_next, has_previous,
+            next_cursor=self.encode_cursor(rows[-1], 'next', number + 1) if has_next and rows else None,
+            previous_cursor=self.encode_cursor(rows[0], 'prev', number - 1) if has_previous and rows else None,
+        )
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'quotes', #a1
     'restaurant', #a2
     'mini_insta', #a3
+    'cs412', # shared import/export commands
     'marathon_analytics',
     'voter_analytics',
     "rest_framework", # NEW
@@ -102,6 +103,32 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    # FileBasedCache, not LocMemCache: the data-version tokens in
+    # cs412.caching live here, and a manage.py import must be able to
+    # invalidate what the web server processes have cached
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default',
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    },
+    # rendered plotly figures; a random quarter of the entries is culled when full
+    'charts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'charts',
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+            'CULL_FREQUENCY': 4,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
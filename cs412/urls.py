@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
+from .charts import PLOTLY_JS_PATH, plotly_js
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,6 +32,7 @@ urlpatterns = [
     path("voter_analytics/", include("voter_analytics.urls")),
     path("dadjokes/", include("dadjokes.urls")),
     path("promptmix/", include("promptmix.urls")),
+    path(PLOTLY_JS_PATH, plotly_js, name="plotly_js"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cs412.settings')
 
 application = get_wsgi_application()
+
+# build the voter graphs snapshot at startup rather than on the first request
+from voter_analytics.snapshot import preload_snapshot  # noqa: E402
+
+preload_snapshot()
@@ -0,0 +1,11 @@
+# file: marathon_analytics/aggregates.py
+# author: Cody Headings, codyh@bu.edu, 11/11/2025
+# desc: database-side statistics over the integer-seconds Result columns
+
+from django.db.models import Avg, Count, Max, Min
+
+
+def finish_summary(results):
+    '''Return the count and average, fastest and slowest finish (seconds) of a Result queryset.'''
+    return results.aggregate(count=Count('pk'), average=Avg('finish_seconds'),
+                             fastest=Min('finish_seconds'), slowest=Max('finish_seconds'))
@@ -0,0 +1,115 @@
+# file: marathon_analytics/distributions.py
+# author: Cody Headings, codyh@bu.edu, 11/12/2025
+# desc: precomputed finish/split time distributions per gender and division
+
+import math
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.db import transaction
+
+from cs412.caching import cached
+from .models import FinishDistribution, Result
+
+# FinishDistribution.measure -> Result column
+MEASURES = {
+    'finish': 'finish_seconds',
+    'half1': 'half1_seconds',
+    'half2': 'half2_seconds',
+}
+
+# seconds a packed distribution stays cached
+DISTRIBUTION_CACHE_TTL = 3600
+
+
+def pack(seconds):
+    '''Pack a sorted list of seconds as little-endian uint32.'''
+    values = array('I', seconds)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack(data):
+    '''Return the array('I') of seconds packed by pack().'''
+    values = array('I')
+    values.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def refresh_distributions(race, batch_size=5000):
+    '''
+    Rebuild a race's FinishDistributions from its Results in one pass:
+    per (gender, division), per gender, and overall, for each measure.
+    Returns the number of distributions stored.
+    '''
+    groups = defaultdict(lambda: {measure: [] for measure in MEASURES})
+    rows = Result.objects.filter(race=race).values_list('gender', 'division', *MEASURES.values())
+    for gender, division, *times in rows.iterator(chunk_size=batch_size):
+        for key in ((gender, division), (gender, ''), ('', '')):
+            for measure, t in zip(MEASURES, times):
+                groups[key][measure].append(t)
+
+    distributions = []
+    for (gender, division), measures in groups.items():
+        for measure, times in measures.items():
+            times.sort()
+            distributions.append(FinishDistribution(race=race, gender=gender, division=division,
+                                                    measure=measure, count=len(times),
+                                                    seconds=pack(times)))
+
+    with transaction.atomic():
+        FinishDistribution.objects.filter(race=race).delete()
+        FinishDistribution.objects.bulk_create(distributions, batch_size=100)
+    return len(distributions)
+
+
+def get_distribution(race, gender='', division='', measure='finish'):
+    '''
+    Return the sorted array('I') of seconds for a group in a race, or None
+    if there is no such group. Reads one row, then serves it from the
+    cache until the race is reloaded.
+    '''
+    def compute():
+        row = (FinishDistribution.objects
+               .filter(race=race, gender=gender, division=division, measure=measure)
+               .values_list('seconds', flat=True).first())
+        return None if row is None else bytes(row)
+    data = cached(f'marathon:distribution:{race.pk}', f'{gender}|{division}|{measure}',
+                  [race.results_tag()], compute, DISTRIBUTION_CACHE_TTL)
+    return None if data is None else unpack(data)
+
+
+def percentile_of(times, seconds):
+    '''
+    Describe where a time falls in a sorted distribution: the percentage
+    of runners at or faster than it, and the number strictly faster and
+    strictly slower.
+    '''
+    at_or_faster = bisect_right(times, seconds)
+    return {
+        'seconds': seconds,
+        'percentile': round(100 * at_or_faster / len(times), 2),
+        'runners_faster': bisect_left(times, seconds),
+        'runners_slower': len(times) - at_or_faster,
+    }
+
+
+def time_at(times, percentile):
+    '''Return the nearest-rank time (seconds) at a percentile (0-100) of a sorted distribution.'''
+    rank = max(1, math.ceil(percentile / 100 * len(times)))
+    return times[min(rank, len(times)) - 1]
+
+
+def histogram(times, bucket_seconds=300):
+    '''Return {bucket start (seconds): runners} for a sorted distribution.'''
+    counts = {}
+    for start in range(times[0] // bucket_seconds * bucket_seconds, times[-1] + 1, bucket_seconds):
+        n = bisect_left(times, start + bucket_seconds) - bisect_left(times, start)
+        if n:
+            counts[start] = n
+    return counts
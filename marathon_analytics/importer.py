@@ -0,0 +1,104 @@
+# file: marathon_analytics/importer.py
+# author: Cody Headings, codyh@bu.edu, 11/08/2025
+# desc: bulk importer for the Chicago Marathon results CSV file
+
+from django.utils.dateparse import parse_time
+
+from cs412.caching import invalidate
+from cs412.importing import ImportTarget, parallel_import, register
+
+from .distributions import refresh_distributions
+from .models import Race, Result, duration_seconds
+from .passing import refresh_passing_counts
+from .prediction import refresh_finish_models
+from .result_charts import warm_result_charts
+from .search import with_search_columns
+
+
+def parse_clock(text):
+    '''Convert an H:MM:SS time from the CSV into a time.'''
+    value = parse_time(text.strip())
+    if value is None:
+        raise ValueError(f'invalid time {text!r}')
+    return value
+
+
+def result_from_row(fields):
+    '''
+    Build an (unsaved) Result from one row of the CSV file:
+    BIB,First Name,Last Name,CTZ,City,State,Gender,Division,
+    Place Overall,Place Gender,Place Division,Start TOD,Finish TOD,Finish,HALF1,HALF2
+    Raises ValueError if the row is malformed.
+    '''
+    if len(fields) < 16:
+        raise ValueError(f'expected 16 columns, found {len(fields)}')
+
+    result = Result(bib=int(fields[0]),
+                    first_name=fields[1],
+                    last_name=fields[2],
+                    ctz=fields[3],
+                    city=fields[4],
+                    state=fields[5],
+                    gender=fields[6],
+                    division=fields[7],
+                    place_overall=int(fields[8]),
+                    place_gender=int(fields[9]),
+                    place_division=int(fields[10]),
+                    start_time_of_day=parse_clock(fields[11]),
+                    finish_time_of_day=parse_clock(fields[12]),
+                    time_finish=parse_clock(fields[13]),
+                    time_half1=parse_clock(fields[14]),
+                    time_half2=parse_clock(fields[15]),
+                    )
+    return with_search_columns(with_seconds(result))
+
+
+def with_seconds(result):
+    '''Fill in a Result's integer-seconds copies of its finish and split times.'''
+    result.finish_seconds = duration_seconds(result.time_finish)
+    result.half1_seconds = duration_seconds(result.time_half1)
+    result.half2_seconds = duration_seconds(result.time_half2)
+    return result
+
+
+def result_from_record(record):
+    '''Build an (unsaved) Result from a dict of typed column values, e.g. a Parquet row.'''
+    return with_search_columns(with_seconds(Result(**record)))
+
+
+def delete_results(race):
+    '''Delete every Result of a race. Returns the number deleted.'''
+    deleted, _ = Result.objects.filter(race=race).delete()
+    return deleted
+
+
+def finish_results(race):
+    '''Compute the derived per-runner columns and statistics once a race is loaded.'''
+    refresh_passing_counts(race)
+    refresh_distributions(race)
+    refresh_finish_models(race)
+    invalidate(race.results_tag())
+    warm_result_charts(race)
+
+
+def import_results(filename, race, workers=1):
+    '''
+    Replace a race's Result records with the contents of the CSV file.
+    Other races are not touched. Returns an ImportStats describing the run.
+    '''
+    return parallel_import('results', filename, workers=workers, scope={'race': race})
+
+
+def race_by_slug(field, slug):
+    '''Return the Race a --race command option names.'''
+    try:
+        return Race.objects.get(slug=slug)
+    except Race.DoesNotExist:
+        raise ValueError(f'No race {slug!r}; load_race creates new races')
+
+
+# lets manage.py load_race (and the generic import commands, with --race) load a results file
+register(ImportTarget('results', Result, result_from_row, 'Results',
+                      before=delete_results, after=finish_results,
+                      from_record=result_from_record, scope_fields=['race'],
+                      scope_lookup=race_by_slug))
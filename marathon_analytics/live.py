@@ -0,0 +1,403 @@
+# file: marathon_analytics/live.py
+# author: Cody Headings, codyh@bu.edu, 11/15/2025
+# desc: race-day timing mat events, their binary log, and in-memory leaderboards
+
+import math
+import os
+import random
+import struct
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import Result
+
+# timing mats in course order; an event names one by index or by name
+CHECKPOINTS = ['START', '5K', '10K', '15K', '20K', 'HALF', '25K', '30K', '35K', '40K', 'FINISH']
+
+# directory of the per-race event logs
+LIVE_TIMING_DIR = Path(getattr(settings, 'LIVE_TIMING_DIR', settings.BASE_DIR / 'live_timing'))
+
+# one logged event: bib (uint32), checkpoint (uint8), clock time in ms since midnight (uint32)
+EVENT = struct.Struct('<IBI')
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def parse_clock_ms(value):
+    '''Convert a clock time (H:MM:SS[.fff] or seconds since midnight) into milliseconds.'''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = value
+    else:
+        seconds = 0.0
+        for part in str(value).split(':'):
+            seconds = seconds * 60 + float(part)
+    # float() accepts 'inf' and 'nan', and JSON's 1e400 is inf
+    if isinstance(seconds, float) and not math.isfinite(seconds):
+        raise ValueError(f'clock time {value!r} is not a number')
+    ms = round(seconds * 1000)
+    if not 0 <= ms < MS_PER_DAY:
+        raise ValueError(f'clock time {value!r} is not within a day')
+    return ms
+
+
+def parse_checkpoint(value):
+    '''Return the index in CHECKPOINTS of a checkpoint given by index or name.'''
+    if isinstance(value, int) and not isinstance(value, bool):
+        index = value
+    else:
+        name = str(value).strip().upper()
+        if name.isdigit():
+            index = int(name)
+        elif name in CHECKPOINTS:
+            index = CHECKPOINTS.index(name)
+        else:
+            raise ValueError(f'unknown checkpoint {value!r}')
+    if not 0 <= index < len(CHECKPOINTS):
+        raise ValueError(f'unknown checkpoint {value!r}')
+    return index
+
+
+def parse_event(data):
+    '''
+    Turn one posted event, {"bib", "checkpoint", "time"} or
+    [bib, checkpoint, time], into a (bib, checkpoint, clock ms) tuple.
+    Raises ValueError if it is malformed.
+    '''
+    if isinstance(data, dict):
+        try:
+            data = [data['bib'], data['checkpoint'], data['time']]
+        except KeyError as e:
+            raise ValueError(f'missing {e.args[0]}')
+    if not isinstance(data, (list, tuple)) or len(data) != 3:
+        raise ValueError('expected bib, checkpoint and time')
+    if isinstance(data[0], float) and not math.isfinite(data[0]):
+        raise ValueError(f'invalid bib {data[0]!r}')
+    bib = int(data[0])
+    if not 0 < bib < 2**32:
+        raise ValueError(f'invalid bib {data[0]!r}')
+    return bib, parse_checkpoint(data[1]), parse_clock_ms(data[2])
+
+
+def format_ms(ms):
+    '''Format milliseconds as H:MM:SS.'''
+    seconds = ms // 1000
+    return f'{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+
+
+def event_log_path(race):
+    '''Return the path of a race's event log.'''
+    return LIVE_TIMING_DIR / f'{race.slug}.events'
+
+
+def pack_events(events):
+    '''Pack (bib, checkpoint, clock ms) tuples as log records.'''
+    return b''.join(EVENT.pack(*event) for event in events)
+
+
+def unpack_events(data):
+    '''Yield the (bib, checkpoint, clock ms) tuples of whole log records in data.'''
+    return EVENT.iter_unpack(data[:len(data) - len(data) % EVENT.size])
+
+
+def append_events(race, events):
+    '''
+    Append events to a race's log with one write. The log is opened for
+    appending, so concurrent writers (threads or processes) never
+    interleave inside a record.
+    '''
+    path = event_log_path(race)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'ab') as f:
+        f.write(pack_events(events))
+
+
+class _BoardNode:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels     # the following node on each level (None at the end)
+        self.width = [1] * levels       # how many positions each link moves forward
+
+
+class SortedBoard:
+    '''
+    Runners ordered by (furthest checkpoint first, elapsed time, bib),
+    kept in an indexable skip list: every link records how many positions
+    it skips, so moving a runner, finding their rank and seeking to an
+    offset are all O(log n) expected, however large the field.
+    '''
+
+    max_levels = 24     # plenty for 2**24 runners
+
+    def __init__(self):
+        self.head = _BoardNode(None, self.max_levels)
+        self.levels = 1     # levels in use
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @staticmethod
+    def key(bib, checkpoint, elapsed):
+        return (-checkpoint, elapsed, bib)
+
+    def _path(self, key):
+        '''
+        Return (the last node before key on each level, the position of
+        each of those nodes), positions counting from 1 with the head at 0.
+        '''
+        path = [self.head] * self.levels
+        positions = [0] * self.levels
+        node, position = self.head, 0
+        for level in reversed(range(self.levels)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            path[level], positions[level] = node, position
+        return path, positions
+
+    def insert(self, key):
+        levels = 1
+        while levels < self.max_levels and random.random() < 0.5:
+            levels += 1
+        for level in range(self.levels, levels):
+            # a new top level: one link from the head past the end
+            self.head.next[level] = None
+            self.head.width[level] = self.size + 1
+        self.levels = max(self.levels, levels)
+
+        path, positions = self._path(key)
+        node = _BoardNode(key, levels)
+        position = positions[0] + 1
+        for level in range(self.levels):
+            before = path[level]
+            if level < levels:
+                node.next[level] = before.next[level]
+                node.width[level] = positions[level] + before.width[level] - position + 1
+                before.next[level] = node
+                before.width[level] = position - positions[level]
+            else:
+                before.width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        path, _ = self._path(key)
+        node = path[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for level in range(self.levels):
+            before = path[level]
+            if before.next[level] is node:
+                before.width[level] += node.width[level] - 1
+                before.next[level] = node.next[level]
+            else:
+                before.width[level] -= 1
+        self.size -= 1
+
+    def update(self, old_key, new_key):
+        '''Move a runner from old_key (None if new to the board) to new_key.'''
+        if old_key is not None:
+            try:
+                self.remove(old_key)
+            except KeyError:
+                pass
+        self.insert(new_key)
+
+    def rank(self, key):
+        '''Return the 1-based position of a key on the board.'''
+        _, positions = self._path(key)
+        return positions[0] + 1
+
+    def top(self, limit, offset=0):
+        '''Return up to limit keys, starting offset places from the top.'''
+        node, position = self.head, 0
+        for level in reversed(range(self.levels)):
+            while node.next[level] is not None and position + node.width[level] <= offset:
+                position += node.width[level]
+                node = node.next[level]
+        keys = []
+        node = node.next[0]
+        while node is not None and len(keys) < limit:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class LiveRace:
+    '''
+    The live state of one race, derived from its event log: each runner's
+    furthest checkpoint and elapsed time, and a SortedBoard overall, per
+    gender and per gender and division. Every process reads new records
+    from the shared log before answering, so all of them agree.
+    '''
+
+    def __init__(self, race):
+        self.race = race
+        self.path = event_log_path(race)
+        self.offset = 0         # bytes of the log applied so far
+        self.sequence = 0       # events applied so far
+        self.runners = {}       # bib -> [checkpoint, clock ms, start clock ms or None, board key]
+        self.boards = {}        # (gender, division) -> SortedBoard
+        self.gun_ms = None      # earliest start seen, for runners with no start event
+        self.lock = threading.Lock()
+        self.entrants = {bib: (first, last, gender, division) for bib, first, last, gender, division in
+                         Result.objects.filter(race=race).values_list(
+                             'bib', 'first_name', 'last_name', 'gender', 'division')}
+
+    def groups(self, bib):
+        '''Return the board keys a runner appears on.'''
+        _, _, gender, division = self.entrants.get(bib, ('', '', '', ''))
+        groups = [('', '')]
+        if gender:
+            groups.append((gender, ''))
+            if division:
+                groups.append((gender, division))
+        return groups
+
+    def elapsed(self, checkpoint, clock, start):
+        '''Return a runner's elapsed ms from their start (or the gun, if their start was missed).'''
+        start = start if start is not None else self.gun_ms
+        return clock - start if start is not None and clock >= start else 0
+
+    def apply(self, bib, checkpoint, clock):
+        '''
+        Apply one event. A start sets the runner's start time; any other
+        checkpoint counts only if it is further than the runner's last one.
+        Returns True if the leaderboards changed.
+        '''
+        runner = self.runners.get(bib)
+        if checkpoint == 0:
+            if self.gun_ms is None or clock < self.gun_ms:
+                self.gun_ms = clock
+            if runner is None:
+                runner = self.runners[bib] = [0, clock, clock, None]
+            elif runner[2] is None:
+                runner[2] = clock
+            else:
+                return False
+        elif runner is None:
+            runner = self.runners[bib] = [checkpoint, clock, None, None]
+        elif checkpoint > runner[0]:
+            runner[0], runner[1] = checkpoint, clock
+        else:
+            return False
+
+        old_key = runner[3]
+        runner[3] = SortedBoard.key(bib, runner[0], self.elapsed(*runner[:3]))
+        for group in self.groups(bib):
+            self.boards.setdefault(group, SortedBoard()).update(old_key, runner[3])
+        return True
+
+    def refresh(self):
+        '''Apply any records appended to the log since the last refresh.'''
+        with self.lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                return
+            if size - self.offset < EVENT.size:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            for bib, checkpoint, clock in unpack_events(data):
+                self.apply(bib, checkpoint, clock)
+                self.sequence += 1
+            self.offset += len(data) - len(data) % EVENT.size
+
+    def runner_row(self, key, rank):
+        '''Return the JSON-serializable leaderboard row of a board key.'''
+        checkpoint, elapsed, bib = -key[0], key[1], key[2]
+        first, last, gender, division = self.entrants.get(bib, ('', '', '', ''))
+        return {'rank': rank, 'bib': bib, 'name': f'{first} {last}'.strip(),
+                'gender': gender, 'division': division,
+                'checkpoint': CHECKPOINTS[checkpoint], 'elapsed': format_ms(elapsed)}
+
+    def leaderboard(self, gender='', division='', limit=25, offset=0):
+        '''Return the rows of one board, best first.'''
+        self.refresh()
+        board = self.boards.get((gender, division if gender else ''))
+        if board is None:
+            return []
+        with self.lock:
+            return [self.runner_row(key, offset + i + 1)
+                    for i, key in enumerate(board.top(limit, offset))]
+
+    def standing(self, bib):
+        '''Return a runner's row with their ranks on every board they appear on, or None.'''
+        self.refresh()
+        with self.lock:
+            if bib not in self.runners:
+                return None
+            key = self.runners[bib][3]
+            row = self.runner_row(key, self.boards[('', '')].rank(key))
+            row['group_ranks'] = {f'{g}|{d}': self.boards[(g, d)].rank(key) for g, d in self.groups(bib)}
+            return row
+
+    def events_since(self, sequence, limit=500):
+        '''
+        Return (events after the given sequence number as dicts, the new
+        sequence number), reading them back from the log.
+        '''
+        self.refresh()
+        sequence = max(0, min(sequence, self.sequence))
+        if sequence == self.sequence:
+            return [], sequence
+        with open(self.path, 'rb') as f:
+            f.seek(sequence * EVENT.size)
+            data = f.read(min(self.sequence - sequence, limit) * EVENT.size)
+        events = [{'bib': bib, 'checkpoint': CHECKPOINTS[checkpoint], 'time': format_ms(clock)}
+                  for bib, checkpoint, clock in unpack_events(data)]
+        return events, sequence + len(events)
+
+
+_live_races = {}
+_live_lock = threading.Lock()
+
+
+def get_live_race(race):
+    '''Return the process-wide LiveRace of a race, building it from the log on first use.'''
+    with _live_lock:
+        live = _live_races.get(race.pk)
+        if live is None:
+            live = _live_races[race.pk] = LiveRace(race)
+    live.refresh()
+    return live
+
+
+def ingest(race, events):
+    '''
+    Validate posted events, append the good ones to the race's log and
+    apply them. Returns (number accepted, [(index, reason)] rejected).
+    '''
+    accepted = []
+    rejected = []
+    for i, data in enumerate(events):
+        try:
+            accepted.append(parse_event(data))
+        except (ValueError, TypeError, OverflowError) as e:
+            rejected.append((i, str(e)))
+    if accepted:
+        append_events(race, accepted)
+        get_live_race(race)
+    return len(accepted), rejected
+
+
+def events_from_results(race):
+    '''
+    Return the start, half and finish mat events of a race's stored
+    results, in clock order, e.g. to record a file for replay_timing.
+    '''
+    events = []
+    rows = Result.objects.filter(race=race).values_list(
+        'bib', 'start_time_of_day', 'half1_seconds', 'finish_seconds')
+    for bib, start, half1, finish in rows.iterator(chunk_size=5000):
+        start_ms = ((start.hour * 60 + start.minute) * 60 + start.second) * 1000
+        events.append((bib, CHECKPOINTS.index('START'), start_ms))
+        events.append((bib, CHECKPOINTS.index('HALF'), (start_ms + half1 * 1000) % MS_PER_DAY))
+        events.append((bib, CHECKPOINTS.index('FINISH'), (start_ms + finish * 1000) % MS_PER_DAY))
+    events.sort(key=lambda event: event[2])
+    return events
@@ -0,0 +1,48 @@
+# file: marathon_analytics/management/commands/load_race.py
+# author: Cody Headings, codyh@bu.edu, 11/14/2025
+# desc: manage.py command to load (or reload) the results of one race
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.columnar import ColumnarError, import_columnar
+from cs412.importing import parallel_import
+from marathon_analytics.models import Race
+
+
+class Command(BaseCommand):
+    help = ('Replace the results of one race with a results CSV, Parquet or Arrow file, '
+            'creating the race if needed. Other races are not touched.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('race', help='slug of the race, e.g. chicago-2023')
+        parser.add_argument('filename', help='path to the results file')
+        parser.add_argument('--name', help='name of a new race (default: the slug)')
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='date of a new race, YYYY-MM-DD')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='CSV parser processes (default 1)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        race, created = Race.objects.get_or_create(slug=options['race'], defaults={
+            'name': options['name'] or options['race'], 'date': options['date']})
+        if created:
+            self.stdout.write(f'Created race {race}.')
+
+        filename = options['filename']
+        try:
+            if filename.lower().endswith(('.parquet', '.arrow')):
+                stats = import_columnar('results', filename, scope={'race': race})
+            else:
+                stats = parallel_import('results', filename, workers=options['workers'],
+                                        scope={'race': race})
+        except ColumnarError as e:
+            raise CommandError(str(e))
+        except OSError as e:
+            raise CommandError(f'Could not read {filename}: {e}')
+
+        self.stdout.write(stats.summary())
@@ -0,0 +1,28 @@
+# file: marathon_analytics/management/commands/refresh_distributions.py
+# author: Cody Headings, codyh@bu.edu, 11/12/2025
+# desc: manage.py command to rebuild the precomputed finish-time distributions
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.caching import invalidate
+from marathon_analytics.distributions import refresh_distributions
+from marathon_analytics.models import Race
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the sorted finish/split time distributions per gender and division.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--race', help='slug of the one race to refresh (default: every race)')
+
+    def handle(self, *args, **options):
+        races = Race.objects.all()
+        if options['race']:
+            races = races.filter(slug=options['race'])
+            if not races:
+                raise CommandError(f'No race {options["race"]!r}')
+
+        for race in races:
+            count = refresh_distributions(race)
+            invalidate(race.results_tag())
+            self.stdout.write(f'Stored {count} finish-time distributions for {race}.')
@@ -0,0 +1,30 @@
+# file: marathon_analytics/management/commands/refresh_finish_models.py
+# author: Cody Headings, codyh@bu.edu, 11/16/2025
+# desc: manage.py command to refit the finish-time prediction lines
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.caching import invalidate
+from marathon_analytics.models import Race
+from marathon_analytics.prediction import np, refresh_finish_models
+
+
+class Command(BaseCommand):
+    help = 'Refit the lines predicting finish time from the first-half split, per gender and division.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--race', help='slug of the one race to refit (default: every race)')
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('Finish-time prediction needs NumPy.')
+        races = Race.objects.all()
+        if options['race']:
+            races = races.filter(slug=options['race'])
+            if not races:
+                raise CommandError(f'No race {options["race"]!r}')
+
+        for race in races:
+            count = refresh_finish_models(race)
+            invalidate(race.results_tag())
+            self.stdout.write(f'Fit {count} finish-time lines for {race}.')
@@ -0,0 +1,28 @@
+# file: marathon_analytics/management/commands/refresh_passing_counts.py
+# author: Cody Headings, codyh@bu.edu, 11/10/2025
+# desc: manage.py command to recompute the runners passed / passed by counts
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cs412.caching import invalidate
+from marathon_analytics.models import Race
+from marathon_analytics.passing import refresh_passing_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute runners_passed and runners_passed_by for every marathon Result.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--race', help='slug of the one race to refresh (default: every race)')
+
+    def handle(self, *args, **options):
+        races = Race.objects.all()
+        if options['race']:
+            races = races.filter(slug=options['race'])
+            if not races:
+                raise CommandError(f'No race {options["race"]!r}')
+
+        for race in races:
+            count = refresh_passing_counts(race)
+            invalidate(race.results_tag())
+            self.stdout.write(f'Updated the passing counts of {count} Results in {race}.')
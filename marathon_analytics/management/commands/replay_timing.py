@@ -0,0 +1,119 @@
+# file: marathon_analytics/management/commands/replay_timing.py
+# author: Cody Headings, codyh@bu.edu, 11/15/2025
+# desc: manage.py command to replay a recorded timing mat event file, for load testing
+
+import json
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marathon_analytics.live import events_from_results, ingest, pack_events, unpack_events
+from marathon_analytics.models import Race
+
+
+class Command(BaseCommand):
+    help = ('Replay a recorded event file (the live timing log format) into a race, '
+            'in batches paced by the events\' clock times, either in-process or by '
+            'POSTing to a running server. --record writes such a file from a loaded race.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('race', help='slug of the race to replay into (or record from)')
+        parser.add_argument('filename', help='the event file')
+        parser.add_argument('--record', action='store_true',
+                            help="write the race's start, half and finish events to the file and stop")
+        parser.add_argument('--speed', type=float, default=60.0,
+                            help='race seconds replayed per second; 0 sends as fast as possible '
+                                 '(default %(default)s)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='most events sent per request (default %(default)s)')
+        parser.add_argument('--url', help='events endpoint of a running server, e.g. '
+                                          'http://localhost:8000/marathon_analytics/live/<race>/events '
+                                          '(default: ingest in this process)')
+        parser.add_argument('--token',
+                            help="bearer token for the events endpoint (the server's LIVE_TIMING_TOKEN)")
+
+    def handle(self, *args, **options):
+        if options['speed'] < 0:
+            raise CommandError('--speed must not be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        race = Race.objects.filter(slug=options['race']).first()
+        if race is None and (options['record'] or not options['url']):
+            raise CommandError(f'No race {options["race"]!r}')
+
+        if options['record']:
+            events = events_from_results(race)
+            with open(options['filename'], 'wb') as f:
+                f.write(pack_events(events))
+            self.stdout.write(f'Wrote {len(events)} events to {options["filename"]}.')
+            return
+
+        try:
+            with open(options['filename'], 'rb') as f:
+                events = sorted(unpack_events(f.read()), key=lambda event: event[2])
+        except OSError as e:
+            raise CommandError(f'Could not read {options["filename"]}: {e}')
+        if not events:
+            raise CommandError(f'{options["filename"]} has no events')
+
+        if options['url']:
+            send = self.poster(options['url'], options['token'])
+        else:
+            send = lambda batch: ingest(race, batch)[0]
+
+        accepted, requests, latencies = 0, 0, []
+        first_clock = events[0][2]
+        started = time.perf_counter()
+        for batch in self.batches(events, options['batch_size'], options['speed'], first_clock, started):
+            sent = time.perf_counter()
+            # clock times travel as seconds since midnight, as from a timing system
+            accepted += send([[bib, checkpoint, clock / 1000] for bib, checkpoint, clock in batch])
+            latencies.append(time.perf_counter() - sent)
+            requests += 1
+
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        self.stdout.write(f'Sent {len(events)} events in {requests} batches over {elapsed:.2f}s '
+                          f'({len(events) / elapsed:,.0f} events/s); {accepted} accepted. '
+                          f'Batch latency median {latencies[len(latencies) // 2] * 1000:.1f}ms, '
+                          f'max {latencies[-1] * 1000:.1f}ms.')
+
+    def batches(self, events, batch_size, speed, first_clock, started):
+        '''
+        Yield batches of events, each sent once the replay clock reaches
+        its first event: (clock - first_clock) / speed seconds after started.
+        '''
+        i = 0
+        while i < len(events):
+            if speed:
+                due = started + (events[i][2] - first_clock) / 1000 / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                now = first_clock + (time.perf_counter() - started) * speed * 1000
+            else:
+                now = float('inf')
+            # everything already due, up to the batch size
+            j = i + 1
+            while j < len(events) and j - i < batch_size and events[j][2] <= now:
+                j += 1
+            yield events[i:j]
+            i = j
+
+    def poster(self, url, token):
+        '''Return a function that POSTs a batch to url and returns the accepted count.'''
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        def send(batch):
+            body = json.dumps({'events': batch}).encode()
+            request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return json.load(response)['accepted']
+            except (urllib.error.URLError, ValueError, KeyError) as e:
+                raise CommandError(f'POST to {url} failed: {e}')
+        return send
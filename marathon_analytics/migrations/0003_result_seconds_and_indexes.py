@@ -0,0 +1,57 @@
+# Store the finish and half-marathon split times as integer seconds as well,
+# filling them in for existing rows, and index the place and time columns.
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractHour, ExtractMinute, ExtractSecond
+
+DURATIONS = {
+    'finish_seconds': 'time_finish',
+    'half1_seconds': 'time_half1',
+    'half2_seconds': 'time_half2',
+}
+
+
+def forwards(apps, schema_editor):
+    '''Convert the existing TimeField durations to seconds in one UPDATE.'''
+    Result = apps.get_model('marathon_analytics', 'Result')
+    Result.objects.update(**{
+        seconds: (ExtractHour(time) * 60 + ExtractMinute(time)) * 60 + ExtractSecond(time)
+        for seconds, time in DURATIONS.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0002_result_passing_counts'),
+    ]
+
+    operations = [
+        *[migrations.AddField(
+            model_name='result',
+            name=seconds,
+            field=models.IntegerField(blank=True, default=0),
+            preserve_default=False,
+        ) for seconds in DURATIONS],
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['place_overall'], name='result_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['gender', 'place_gender'], name='result_gender_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['division', 'place_division'], name='result_division_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['finish_seconds'], name='result_finish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['gender', 'division', 'finish_seconds'],
+                               name='result_group_finish_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0003_result_seconds_and_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinishDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gender', models.CharField(blank=True, max_length=6)),
+                ('division', models.CharField(blank=True, max_length=6)),
+                ('measure', models.CharField(max_length=6)),
+                ('count', models.IntegerField()),
+                ('seconds', models.BinaryField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('gender', 'division', 'measure'), name='unique_finish_distribution')],
+            },
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Add the Race model and partition Result and FinishDistribution by race.
+# Existing rows are assigned to a new "Chicago Marathon 2023" race, and
+# every Result index now leads with the race.
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forwards(apps, schema_editor):
+    '''Create the Chicago 2023 race and move every existing row into it.'''
+    Race = apps.get_model('marathon_analytics', 'Race')
+    race, _ = Race.objects.get_or_create(slug='chicago-2023', defaults={
+        'name': 'Chicago Marathon 2023', 'date': datetime.date(2023, 10, 8)})
+    for name in ('Result', 'FinishDistribution'):
+        apps.get_model('marathon_analytics', name).objects.update(race=race)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0004_finish_distribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Race',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-date', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='race',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    related_name='results', to='marathon_analytics.race'),
+        ),
+        migrations.AddField(
+            model_name='finishdistribution',
+            name='race',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE,
+                                    to='marathon_analytics.race'),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='result',
+            name='race',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE,
+                                    related_name='results', to='marathon_analytics.race'),
+        ),
+        migrations.AlterField(
+            model_name='finishdistribution',
+            name='race',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE,
+                                    to='marathon_analytics.race'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='finishdistribution',
+            name='unique_finish_distribution',
+        ),
+        migrations.AddConstraint(
+            model_name='finishdistribution',
+            constraint=models.UniqueConstraint(fields=('race', 'gender', 'division', 'measure'),
+                                               name='unique_finish_distribution'),
+        ),
+        *[migrations.RemoveIndex(model_name='result', name=name) for name in (
+            'result_place_idx', 'result_gender_place_idx', 'result_division_place_idx',
+            'result_finish_idx', 'result_group_finish_idx')],
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'place_overall'], name='result_race_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'gender', 'place_gender'],
+                               name='result_race_gender_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'division', 'place_division'],
+                               name='result_race_div_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'finish_seconds'], name='result_race_finish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'gender', 'division', 'finish_seconds'],
+                               name='result_race_group_finish_idx'),
+        ),
+    ]
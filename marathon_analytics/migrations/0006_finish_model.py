@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0005_race'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinishModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gender', models.CharField(blank=True, max_length=6)),
+                ('division', models.CharField(blank=True, max_length=6)),
+                ('runners', models.IntegerField()),
+                ('slope', models.FloatField()),
+                ('intercept', models.FloatField()),
+                ('residual_std', models.FloatField()),
+                ('race', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='marathon_analytics.race')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('race', 'gender', 'division'), name='unique_finish_model')],
+            },
+        ),
+    ]
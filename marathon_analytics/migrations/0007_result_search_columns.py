@@ -0,0 +1,55 @@
+# Add lowercase shadow columns of the searchable Result fields, filling
+# them in for existing rows, and index them (and bib) after the race.
+
+from django.db import migrations, models
+
+SEARCH_COLUMNS = {
+    'last_name_lower': 'last_name',
+    'city_lower': 'city',
+    'state_lower': 'state',
+    'ctz_lower': 'ctz',
+}
+
+
+def normalize(text):
+    return ' '.join(text.split()).lower()
+
+
+def forwards(apps, schema_editor):
+    '''Fill the shadow columns in Python, so they match what the importer stores.'''
+    Result = apps.get_model('marathon_analytics', 'Result')
+    quote = schema_editor.connection.ops.quote_name
+    table = quote(Result._meta.db_table)
+    sql = (f'UPDATE {table} SET '
+           + ', '.join(f'{quote(shadow)} = %s' for shadow in SEARCH_COLUMNS)
+           + f' WHERE {quote("id")} = %s')
+    rows = Result.objects.values_list('pk', *SEARCH_COLUMNS.values())
+    params = [(*[normalize(value) for value in values], pk) for pk, *values in rows.iterator(chunk_size=5000)]
+    with schema_editor.connection.cursor() as cursor:
+        for i in range(0, len(params), 5000):
+            cursor.executemany(sql, params[i:i + 5000])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0006_finish_model'),
+    ]
+
+    operations = [
+        *[migrations.AddField(
+            model_name='result',
+            name=shadow,
+            field=models.TextField(blank=True, default=''),
+            preserve_default=False,
+        ) for shadow in SEARCH_COLUMNS],
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', 'bib'], name='result_race_bib_idx'),
+        ),
+        *[migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['race', shadow], name=f'result_race_{source}_idx'),
+        ) for shadow, source in SEARCH_COLUMNS.items()],
+    ]
@@ -0,0 +1,50 @@
+# Fill FinishDistribution for every race's existing results. 0004 created
+# the table empty, so percentiles returned 404 until each race was
+# reloaded; run after 0005, which partitions it by race.
+
+from collections import defaultdict
+
+from django.db import migrations
+
+from marathon_analytics.distributions import pack
+
+# the measures when this migration was written (see distributions.MEASURES)
+MEASURES = {
+    'finish': 'finish_seconds',
+    'half1': 'half1_seconds',
+    'half2': 'half2_seconds',
+}
+
+
+def forwards(apps, schema_editor):
+    '''Rebuild each race's distributions (see distributions.refresh_distributions).'''
+    Race = apps.get_model('marathon_analytics', 'Race')
+    Result = apps.get_model('marathon_analytics', 'Result')
+    FinishDistribution = apps.get_model('marathon_analytics', 'FinishDistribution')
+
+    for race in Race.objects.all():
+        groups = defaultdict(lambda: {measure: [] for measure in MEASURES})
+        rows = Result.objects.filter(race=race).values_list('gender', 'division', *MEASURES.values())
+        for gender, division, *times in rows.iterator(chunk_size=5000):
+            for key in ((gender, division), (gender, ''), ('', '')):
+                for measure, t in zip(MEASURES, times):
+                    groups[key][measure].append(t)
+
+        FinishDistribution.objects.filter(race=race).delete()
+        FinishDistribution.objects.bulk_create(
+            (FinishDistribution(race=race, gender=gender, division=division, measure=measure,
+                                count=len(times), seconds=pack(sorted(times)))
+             for (gender, division), measures in groups.items()
+             for measure, times in measures.items()),
+            batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0007_result_search_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Fit FinishModel lines for every race's existing results. 0006 created
+# the table empty, so predictions returned 404 until each race was
+# reloaded. Without NumPy there are no lines to fit, as on import.
+
+from django.db import migrations
+
+from marathon_analytics.prediction import fit_line
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the subgroup threshold when this migration was written (see prediction.MIN_RUNNERS)
+MIN_RUNNERS = 20
+
+
+def forwards(apps, schema_editor):
+    '''Fit each race's lines (see prediction.refresh_finish_models).'''
+    if np is None:
+        return
+    Race = apps.get_model('marathon_analytics', 'Race')
+    Result = apps.get_model('marathon_analytics', 'Result')
+    FinishModel = apps.get_model('marathon_analytics', 'FinishModel')
+
+    for race in Race.objects.all():
+        FinishModel.objects.filter(race=race).delete()
+        rows = list(Result.objects.filter(race=race)
+                    .values_list('gender', 'division', 'half1_seconds', 'finish_seconds'))
+        if not rows:
+            continue
+        genders, divisions, half1, finish = zip(*rows)
+        genders, divisions = np.array(genders), np.array(divisions)
+        half1, finish = np.array(half1, dtype=np.float64), np.array(finish, dtype=np.float64)
+
+        groups = [('', '', np.ones(len(half1), dtype=bool))]
+        for gender in np.unique(genders):
+            in_gender = genders == gender
+            groups.append((gender, '', in_gender))
+            for division in np.unique(divisions[in_gender]):
+                groups.append((gender, division, in_gender & (divisions == division)))
+
+        finish_models = []
+        for gender, division, mask in groups:
+            n = int(mask.sum())
+            if n < MIN_RUNNERS and (gender, division) != ('', ''):
+                continue
+            slope, intercept, std = fit_line(half1[mask], finish[mask])
+            finish_models.append(FinishModel(race=race, gender=str(gender), division=str(division),
+                                             runners=n, slope=slope, intercept=intercept,
+                                             residual_std=std))
+        FinishModel.objects.bulk_create(finish_models)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marathon_analytics', '0008_fill_finish_distributions'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
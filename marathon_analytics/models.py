@@ -1,12 +1,47 @@
 from django.db import models
 
+
+def normalize(text):
+    '''Return text lowercased with its whitespace collapsed, as stored in the *_lower search columns.'''
+    return ' '.join(text.split()).lower()
+
+
+def duration_seconds(t):
+    '''Return a duration stored as a time of day (H:MM:SS) in whole seconds.'''
+    return (t.hour * 60 + t.minute) * 60 + t.second
+
 # Create your models here.
+class Race(models.Model):
+    '''One marathon, e.g. the Chicago Marathon 2023, whose results are loaded together.'''
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date', 'name']
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return self.name
+
+    def results_tag(self):
+        '''
+        Return the cache version tag of this race's results (see
+        cs412.caching), so loading one race leaves the others' caches alone.
+        '''
+        return f'{Result._meta.db_table}:race-{self.pk}'
+
+
 class Result(models.Model):
     '''
-    Store/represent the data from one runner at the Chicago Marathon 2023.
+    Store/represent the data from one runner in one Race, e.g. the Chicago Marathon 2023.
     BIB,First Name,Last Name,CTZ,City,State,Gender,Division,
     Place Overall,Place Gender,Place Division,Start TOD,Finish TOD,Finish,HALF1,HALF2
     '''
+    # every index below leads with race, so it needs no index of its own
+    race = models.ForeignKey(Race, on_delete=models.CASCADE, related_name='results',
+                             db_index=False)
+
     # identification
     bib = models.IntegerField()
     first_name = models.TextField()
@@ -31,6 +66,38 @@ class Result(models.Model):
     time_finish = models.TimeField()
     time_half1 = models.TimeField()
     time_half2 = models.TimeField()
+
+    # the same durations in whole seconds, so SQL can aggregate them
+    finish_seconds = models.IntegerField(blank=True)
+    half1_seconds = models.IntegerField(blank=True)
+    half2_seconds = models.IntegerField(blank=True)
+
+    # normalize()d copies of the searchable columns, kept by the importer (see search.py)
+    last_name_lower = models.TextField(blank=True)
+    city_lower = models.TextField(blank=True)
+    state_lower = models.TextField(blank=True)
+    ctz_lower = models.TextField(blank=True)
+
+    # computed for every runner after each import (see passing.refresh_passing_counts)
+    runners_passed = models.IntegerField(null=True, blank=True)
+    runners_passed_by = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['race', 'place_overall'], name='result_race_place_idx'),
+            models.Index(fields=['race', 'gender', 'place_gender'],
+                         name='result_race_gender_place_idx'),
+            models.Index(fields=['race', 'division', 'place_division'],
+                         name='result_race_div_place_idx'),
+            models.Index(fields=['race', 'finish_seconds'], name='result_race_finish_idx'),
+            models.Index(fields=['race', 'gender', 'division', 'finish_seconds'],
+                         name='result_race_group_finish_idx'),
+            models.Index(fields=['race', 'bib'], name='result_race_bib_idx'),
+            models.Index(fields=['race', 'last_name_lower'], name='result_race_last_name_idx'),
+            models.Index(fields=['race', 'city_lower'], name='result_race_city_idx'),
+            models.Index(fields=['race', 'state_lower'], name='result_race_state_idx'),
+            models.Index(fields=['race', 'ctz_lower'], name='result_race_ctz_idx'),
+        ]
  
     def __str__(self):
         '''Return a string representation of this model instance.'''
@@ -38,60 +105,80 @@ class Result(models.Model):
     
     def get_runners_passed(self):
         '''Return the number of runners passed by this runner.'''
-        started_first = Result.objects.filter(start_time_of_day__lt=self.start_time_of_day)
+        if self.runners_passed is not None:
+            return self.runners_passed
+        started_first = Result.objects.filter(race=self.race_id,
+                                              start_time_of_day__lt=self.start_time_of_day)
         passed = started_first.filter(finish_time_of_day__gt=self.finish_time_of_day)
  
-        return len(passed)
+        return passed.count()
         
     def get_runners_passed_by(self):
         '''Return the number of runners who passed this runner.'''
-        started_later = Result.objects.filter(start_time_of_day__gt=self.start_time_of_day)
+        if self.runners_passed_by is not None:
+            return self.runners_passed_by
+        started_later = Result.objects.filter(race=self.race_id,
+                                              start_time_of_day__gt=self.start_time_of_day)
         passed_by = started_later.filter(finish_time_of_day__lt=self.finish_time_of_day)
  
-        return len(passed_by)
+        return passed_by.count()
     
-def load_data():
-    '''Function to load data records from CSV file into Django model instances.'''
+class FinishDistribution(models.Model):
+    '''
+    Every runner's time for one measure (finish, half1 or half2) in one
+    gender and division of a race, sorted and packed as little-endian
+    uint32 seconds. A blank gender or division means all of them.
+    See distributions.py.
+    '''
+    race = models.ForeignKey(Race, on_delete=models.CASCADE, db_index=False)
+    gender = models.CharField(max_length=6, blank=True)
+    division = models.CharField(max_length=6, blank=True)
+    measure = models.CharField(max_length=6)
+    count = models.IntegerField()
+    seconds = models.BinaryField()
 
-    # delete existing records to prevent duplicates:
-    Result.objects.all().delete()
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['race', 'gender', 'division', 'measure'],
+                                    name='unique_finish_distribution'),
+        ]
 
-    filename = 'C:/Users/green/Downloads/2023_chicago_results.csv'
-    f = open(filename)
-    f.readline() # discard headers
- 
-    for line in f:
-        fields = line.split(',')
-		# show which value in each field
-        # print(f'fields={fields}')
-        # for i in range(len(fields)):
-        #     print(f'fields[{i}] = {fields[i]}')
-
-        # create a new instance of Result object with this record from CSV
-        try:
-            result = Result(bib=fields[0],
-                            first_name=fields[1],
-                            last_name=fields[2],
-                            ctz = fields[3],
-                            city = fields[4],
-                            state = fields[5],
-                            
-                            gender = fields[6],
-                            division = fields[7],
-    
-                            place_overall = fields[8],
-                            place_gender = fields[9],
-                            place_division = fields[10],
-                        
-                            start_time_of_day = fields[11],
-                            finish_time_of_day = fields[12],
-                            time_finish = fields[13],
-                            time_half1 = fields[14],
-                            time_half2 = fields[15],
-                        )
-            result.save() # commit to database
-            print(f'Created result: {result}')
-        except:
-            print(f"Skipped: {fields}")
-
-    print(f'Done. Created {len(Result.objects.all())} Results.')
\ No newline at end of file
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.measure} {self.gender or "all"} {self.division or "all"}: {self.count} runners'
+
+class FinishModel(models.Model):
+    '''
+    A least-squares line predicting finish time from the first-half split,
+    finish_seconds = slope * half1_seconds + intercept, fit to one gender
+    and division of a race. A blank gender or division means all of them.
+    See prediction.py.
+    '''
+    race = models.ForeignKey(Race, on_delete=models.CASCADE, db_index=False)
+    gender = models.CharField(max_length=6, blank=True)
+    division = models.CharField(max_length=6, blank=True)
+    runners = models.IntegerField()
+    slope = models.FloatField()
+    intercept = models.FloatField()
+    residual_std = models.FloatField()  # seconds
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['race', 'gender', 'division'],
+                                    name='unique_finish_model'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return (f'{self.gender or "all"} {self.division or "all"}: '
+                f'finish = {self.slope:.3f} * half1 + {self.intercept:.0f}s')
+
+def load_data(filename='C:/Users/green/Downloads/2023_chicago_results.csv', race='chicago-2023'):
+    '''
+    Function to load data records from CSV file into Django model instances.
+    Replaces the results of the race with the given slug; other races are untouched.
+    '''
+    from .importer import import_results
+
+    stats = import_results(filename, Race.objects.get(slug=race))
+    print(stats.summary())
@@ -0,0 +1,96 @@
+# file: marathon_analytics/passing.py
+# author: Cody Headings, codyh@bu.edu, 11/10/2025
+# desc: O(n log n) "runners passed / passed by" counts for every Result
+
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+
+from django.db import connection, transaction
+
+from .models import Result
+
+
+class FenwickTree:
+    '''Counts of inserted values by rank 0..size-1, with O(log n) prefix sums.'''
+
+    def __init__(self, size):
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    def add(self, rank):
+        self.total += 1
+        i = rank + 1
+        while i < len(self.tree):
+            self.tree[i] += 1
+            i += i & -i
+
+    def count_below(self, rank):
+        '''Return how many inserted values have a rank lower than rank.'''
+        n = 0
+        i = rank
+        while i > 0:
+            n += self.tree[i]
+            i -= i & -i
+        return n
+
+
+def seconds(t):
+    '''Return a time of day as seconds since midnight.'''
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+
+def passing_counts(runners):
+    '''
+    Given (key, start, finish) tuples, return {key: (passed, passed_by)}:
+    passed counts runners who started strictly earlier and finished
+    strictly later; passed_by counts those who started strictly later
+    and finished strictly earlier. Runners are swept in start order
+    while a Fenwick tree over finish-time ranks counts the ones already
+    seen, so the whole field takes O(n log n) instead of O(n^2).
+    '''
+    runners = sorted(runners, key=lambda r: r[1])
+    finishes = sorted(r[2] for r in runners)
+    counts = {key: [0, 0] for key, _, _ in runners}
+
+    # earliest starters first: passed = earlier starters finishing after me
+    tree = FenwickTree(len(finishes))
+    for _, group in groupby(runners, key=lambda r: r[1]):
+        group = list(group)
+        for key, _, finish in group:
+            counts[key][0] = tree.total - tree.count_below(bisect_right(finishes, finish))
+        # runners with the same start are added together, so none counts the others
+        for _, _, finish in group:
+            tree.add(bisect_left(finishes, finish))
+
+    # latest starters first: passed_by = later starters finishing before me
+    tree = FenwickTree(len(finishes))
+    for _, group in groupby(reversed(runners), key=lambda r: r[1]):
+        group = list(group)
+        for key, _, finish in group:
+            counts[key][1] = tree.count_below(bisect_left(finishes, finish))
+        for _, _, finish in group:
+            tree.add(bisect_left(finishes, finish))
+
+    return {key: tuple(c) for key, c in counts.items()}
+
+
+def refresh_passing_counts(race, batch_size=5000):
+    '''
+    Recompute runners_passed and runners_passed_by for every Result in a
+    race. Returns the number of Results updated.
+    '''
+    rows = Result.objects.filter(race=race).values_list('pk', 'start_time_of_day', 'finish_time_of_day')
+    counts = passing_counts((pk, seconds(start), seconds(finish))
+                            for pk, start, finish in rows.iterator(chunk_size=batch_size))
+
+    # one prepared UPDATE run for every row; bulk_update's CASE expressions
+    # grow with the batch and are much slower on SQLite
+    table = connection.ops.quote_name(Result._meta.db_table)
+    sql = (f'UPDATE {table} SET {connection.ops.quote_name("runners_passed")} = %s, '
+           f'{connection.ops.quote_name("runners_passed_by")} = %s '
+           f'WHERE {connection.ops.quote_name("id")} = %s')
+    params = [(passed, passed_by, pk) for pk, (passed, passed_by) in counts.items()]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(params), batch_size):
+            cursor.executemany(sql, params[i:i + batch_size])
+    return len(params)
@@ -0,0 +1,159 @@
+# file: marathon_analytics/prediction.py
+# author: Cody Headings, codyh@bu.edu, 11/16/2025
+# desc: finish-time prediction from the first-half split, fit with NumPy least squares
+
+from django.db import transaction
+
+from cs412.caching import cached
+from .models import FinishModel, Result
+
+try:
+    import numpy as np
+except ImportError:  # predictions are optional; callers show none
+    np = None
+
+# groups with fewer runners use their gender's (or the whole field's) line
+MIN_RUNNERS = 20
+
+# seconds a race's coefficients stay cached
+FINISH_MODEL_CACHE_TTL = 3600
+
+
+def fit_line(x, y):
+    '''Return (slope, intercept, residual standard deviation) of the least-squares line y ~ x.'''
+    design = np.column_stack([x, np.ones_like(x)])
+    (slope, intercept), *_ = np.linalg.lstsq(design, y, rcond=None)
+    residuals = y - (slope * x + intercept)
+    return float(slope), float(intercept), float(residuals.std())
+
+
+def result_columns(race):
+    '''Return a race's (genders, divisions, half1 seconds, finish seconds) as NumPy arrays.'''
+    rows = list(Result.objects.filter(race=race)
+                .values_list('gender', 'division', 'half1_seconds', 'finish_seconds'))
+    if not rows:
+        return None
+    genders, divisions, half1, finish = zip(*rows)
+    return (np.array(genders), np.array(divisions),
+            np.array(half1, dtype=np.float64), np.array(finish, dtype=np.float64))
+
+
+def refresh_finish_models(race):
+    '''
+    Fit a FinishModel to a race's whole field, each gender, and each gender
+    and division with at least MIN_RUNNERS runners, from one query.
+    Returns the number of models stored (0 without NumPy).
+    '''
+    if np is None:
+        return 0
+    columns = result_columns(race)
+    with transaction.atomic():
+        FinishModel.objects.filter(race=race).delete()
+        if columns is None:
+            return 0
+        genders, divisions, half1, finish = columns
+
+        groups = [('', '', np.ones(len(half1), dtype=bool))]
+        for gender in np.unique(genders):
+            in_gender = genders == gender
+            groups.append((gender, '', in_gender))
+            for division in np.unique(divisions[in_gender]):
+                groups.append((gender, division, in_gender & (divisions == division)))
+
+        finish_models = []
+        for gender, division, mask in groups:
+            n = int(mask.sum())
+            if n < MIN_RUNNERS and (gender, division) != ('', ''):
+                continue
+            slope, intercept, std = fit_line(half1[mask], finish[mask])
+            finish_models.append(FinishModel(race=race, gender=str(gender), division=str(division),
+                                             runners=n, slope=slope, intercept=intercept,
+                                             residual_std=std))
+        FinishModel.objects.bulk_create(finish_models)
+    return len(finish_models)
+
+
+def get_finish_models(race):
+    '''Return {(gender, division): (slope, intercept, residual_std, runners)} for a race, cached.'''
+    def compute():
+        return {(g, d): (slope, intercept, std, n) for g, d, slope, intercept, std, n in
+                FinishModel.objects.filter(race=race).values_list(
+                    'gender', 'division', 'slope', 'intercept', 'residual_std', 'runners')}
+    return cached('marathon:finish_models', race.pk, [race.results_tag()], compute,
+                  FINISH_MODEL_CACHE_TTL)
+
+
+def model_for(finish_models, gender, division):
+    '''Return ((gender, division), coefficients) of the most specific line fit for a group, or None.'''
+    for group in ((gender, division), (gender, ''), ('', '')):
+        if group in finish_models:
+            return group, finish_models[group]
+    return None
+
+
+def predict_finish(finish_models, gender, division, half1_seconds):
+    '''
+    Return {"predicted", "residual_std", "gender", "division", "runners"}
+    for a first-half split, or None if the race has no fitted lines.
+    '''
+    found = model_for(finish_models, gender, division)
+    if found is None:
+        return None
+    (gender, division), (slope, intercept, std, n) = found
+    return {'predicted': round(slope * half1_seconds + intercept), 'residual_std': round(std),
+            'gender': gender, 'division': division, 'runners': n}
+
+
+def pacing_consistency(half1_seconds, half2_seconds):
+    '''
+    Score how evenly a runner paced, 0-100: 100 for identical halves, one
+    point off for each percent the second half differs from the first.
+    '''
+    if not half1_seconds:
+        return None
+    return max(0.0, round(100 - 100 * abs(half2_seconds - half1_seconds) / half1_seconds, 1))
+
+
+def score_race(race):
+    '''
+    Predict every runner of a race at once: returns (predicted finish,
+    actual finish, residual z-score) arrays in one vectorized pass, or
+    None without NumPy or results.
+    '''
+    if np is None:
+        return None
+    columns = result_columns(race)
+    finish_models = get_finish_models(race)
+    if columns is None or ('', '') not in finish_models:
+        return None
+    genders, divisions, half1, finish = columns
+
+    # apply the whole-field line, then gender lines, then division lines over them
+    slope, intercept, std = (np.zeros(len(half1)) for _ in range(3))
+    for (gender, division), (s, i, sd, _) in sorted(finish_models.items(),
+                                                     key=lambda item: (bool(item[0][0]), bool(item[0][1]))):
+        mask = np.ones(len(half1), dtype=bool)
+        if gender:
+            mask &= genders == gender
+        if division:
+            mask &= divisions == division
+        slope[mask], intercept[mask], std[mask] = s, i, sd
+
+    predicted = slope * half1 + intercept
+    z = np.divide(finish - predicted, std, out=np.zeros_like(predicted), where=std > 0)
+    return predicted, finish, z
+
+
+def accuracy_summary(race):
+    '''
+    Return how well the lines predict a race's field: runners scored, mean
+    absolute error (seconds) and the share finishing within 5 minutes of
+    their prediction. None without NumPy or results.
+    '''
+    scored = score_race(race)
+    if scored is None:
+        return None
+    predicted, finish, _ = scored
+    error = np.abs(finish - predicted)
+    return {'runners': len(finish), 'mean_abs_error': round(float(error.mean())),
+            'within_5_minutes': round(float((error <= 300).mean()), 4)}
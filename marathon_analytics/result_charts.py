@@ -0,0 +1,72 @@
+# file: marathon_analytics/result_charts.py
+# author: Cody Headings, codyh@bu.edu, 11/13/2025
+# desc: per-runner chart cache for the result detail page
+
+import plotly.graph_objs as go
+from django.conf import settings
+
+from cs412.caching import versioned_key
+from cs412.charts import CHART_CACHE_TTL, chart_cache, chart_cache_is_shared, render_figure
+from .models import Result
+
+# number of top finishers whose charts are rendered after each import (when
+# the chart cache is shared with the web processes)
+RESULT_CHART_WARM_COUNT = getattr(settings, 'RESULT_CHART_WARM_COUNT', 25)
+
+
+def result_charts_key(r):
+    '''Return the cache key of a runner's charts for the current results of their race.'''
+    return versioned_key('chart:result_detail', r.pk, r.race.results_tag())
+
+
+def render_result_charts(r):
+    '''Render the detail page charts of one Result: {'splits': div, 'passed': div}.'''
+    # graph of first half/second half as pie chart
+    splits = {"data": [go.Pie(labels=['first half', 'second half'],
+                              values=[r.half1_seconds, r.half2_seconds])],
+              "layout_title_text": "Half Marathon Splits"}
+
+    # graph of runners who passed/passed by
+    x = [f'Runners Passed by {r.first_name}', f'Runners who Passed {r.first_name}']
+    y = [r.get_runners_passed(), r.get_runners_passed_by()]
+    passed = {"data": [go.Bar(x=x, y=y)],
+              "layout_title_text": "Runners Passed/Passed By"}
+
+    return {'splits': render_figure(splits), 'passed': render_figure(passed)}
+
+
+def result_charts(r):
+    '''
+    Return render_result_charts(r), cached as one entry per runner so a
+    page view costs a single cache read. Reloading the race changes its
+    version token; as long as the default cache holding the tokens is
+    shared (see CACHES), every process then misses and renders afresh.
+    '''
+    key = result_charts_key(r)
+    cache = chart_cache()
+    charts = cache.get(key)
+    if charts is None:
+        charts = render_result_charts(r)
+        cache.set(key, charts, CHART_CACHE_TTL)
+    return charts
+
+
+def warm_result_charts(race, count=RESULT_CHART_WARM_COUNT):
+    '''
+    Render and cache the charts of a race's top count finishers overall,
+    skipping any already cached. Returns the number rendered; 0 if the
+    chart cache is local to this process, where no web request would
+    ever read them.
+    '''
+    if not chart_cache_is_shared():
+        return 0
+    results = Result.objects.filter(race=race).order_by('place_overall')[:count]
+    cache = chart_cache()
+    keys = {}
+    for r in results:
+        r.race = race
+        keys[result_charts_key(r)] = r
+    cached = cache.get_many(list(keys))
+    missing = {key: render_result_charts(r) for key, r in keys.items() if key not in cached}
+    cache.set_many(missing, CHART_CACHE_TTL)
+    return len(missing)
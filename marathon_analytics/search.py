@@ -0,0 +1,49 @@
+# file: marathon_analytics/search.py
+# author: Cody Headings, codyh@bu.edu, 11/17/2025
+# desc: indexed runner lookup by bib, last name prefix, city, state and country
+
+from django.db.models import Q
+
+from .models import normalize
+
+# shadow column -> the Result column it is a normalize()d copy of
+SEARCH_COLUMNS = {
+    'last_name_lower': 'last_name',
+    'city_lower': 'city',
+    'state_lower': 'state',
+    'ctz_lower': 'ctz',
+}
+
+# sorts after any character in a name, so [prefix, prefix + _PREFIX_END) is a prefix range
+_PREFIX_END = '\uffff'
+
+
+def with_search_columns(result):
+    '''Fill in a Result's lowercase shadow columns from the columns they copy.'''
+    for shadow, column in SEARCH_COLUMNS.items():
+        setattr(result, shadow, normalize(getattr(result, column)))
+    return result
+
+
+def prefix_q(field, prefix):
+    '''
+    Return a Q matching field values starting with prefix, written as a
+    range so it can use the index (SQLite's LIKE cannot).
+    '''
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + _PREFIX_END})
+
+
+def search_results(results, bib=None, last_name='', city='', state='', ctz=''):
+    '''
+    Limit a race's Result queryset to an exact bib, a last name prefix,
+    and exact (case-insensitive) city, state and country. Every filter
+    reads the normalized shadow columns that the (race, column) indexes cover.
+    '''
+    if bib is not None:
+        results = results.filter(bib=bib)
+    if normalize(last_name):
+        results = results.filter(prefix_q('last_name_lower', normalize(last_name)))
+    for shadow, value in (('city_lower', city), ('state_lower', state), ('ctz_lower', ctz)):
+        if normalize(value):
+            results = results.filter(**{shadow: normalize(value)})
+    return results
@@ -1,3 +1,292 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+from bisect import insort
+from datetime import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .distributions import histogram, pack, percentile_of, time_at, unpack
+from .importer import with_seconds
+from .live import CHECKPOINTS, LiveRace, SortedBoard, ingest, parse_event
+from .models import Race, Result
+from .passing import FenwickTree, passing_counts
+from .prediction import refresh_finish_models
+from .views import parse_seconds
+
+# keep the tests' cached values and version tokens out of the shared caches
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    'charts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-charts'},
+}
+
+
+def clock(seconds):
+    '''Return a number of seconds as a time of day.'''
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def add_result(race, bib, half1, finish, gender='F', division='30-34', start=8 * 3600):
+    '''Save a Result with the given split and finish (in seconds).'''
+    result = with_seconds(Result(
+        race=race, bib=bib, first_name='ANN', last_name='RUNNER', ctz='USA', city='Boston',
+        state='MA', gender=gender, division=division, place_overall=bib, place_gender=bib,
+        place_division=bib, start_time_of_day=clock(start), finish_time_of_day=clock(start + finish),
+        time_finish=clock(finish), time_half1=clock(half1), time_half2=clock(finish - half1)))
+    result.save()
+    return result
+
+
+def brute_force_passing(runners):
+    '''The O(n^2) definition of passing_counts(), for comparison.'''
+    return {key: (sum(1 for _, s, f in runners if s < start and f > finish),
+                  sum(1 for _, s, f in runners if s > start and f < finish))
+            for key, start, finish in runners}
+
+
+class PassingCountsTests(SimpleTestCase):
+    '''passing_counts() sweeps with a Fenwick tree; ties must never count as passes.'''
+
+    def test_small_field(self):
+        runners = [('a', 0, 100), ('b', 10, 90), ('c', 20, 120), ('d', 20, 95)]
+        self.assertEqual(passing_counts(runners), {
+            'a': (0, 2),    # b and d started later and finished earlier
+            'b': (1, 0),    # started after a, finished before it
+            'c': (0, 0),    # finished last; d has the same start
+            'd': (1, 0),    # passed a
+        })
+
+    def test_ties_do_not_pass(self):
+        # a, b and d share a start, and a, c and d a finish: only c passes b
+        runners = [('a', 0, 50), ('b', 0, 60), ('c', 5, 50), ('d', 0, 50)]
+        self.assertEqual(passing_counts(runners), brute_force_passing(runners))
+        self.assertEqual(passing_counts(runners)['d'], (0, 0))
+
+    def test_matches_brute_force_with_ties(self):
+        rng = random.Random(412)
+        for size in (1, 2, 10, 200, 500):
+            # narrow ranges, so many runners share a start or a finish
+            runners = [(i, rng.randrange(15), rng.randrange(40)) for i in range(size)]
+            with self.subTest(size=size):
+                self.assertEqual(passing_counts(runners), brute_force_passing(runners))
+
+    def test_empty_field(self):
+        self.assertEqual(passing_counts([]), {})
+
+    def test_fenwick_tree_counts_below(self):
+        tree = FenwickTree(8)
+        for rank in (3, 1, 3, 7, 0):
+            tree.add(rank)
+        self.assertEqual([tree.count_below(r) for r in range(9)], [0, 1, 2, 2, 4, 4, 4, 4, 5])
+        self.assertEqual(tree.total, 5)
+
+
+class DistributionTests(SimpleTestCase):
+    '''Percentiles, nearest-rank times and histograms of a sorted distribution.'''
+
+    times = unpack(pack([100, 200, 200, 300, 500]))
+
+    def test_pack_round_trip(self):
+        self.assertEqual(list(self.times), [100, 200, 200, 300, 500])
+        self.assertEqual(pack([1, 256]), b'\x01\x00\x00\x00\x00\x01\x00\x00')
+
+    def test_percentile_of(self):
+        self.assertEqual(percentile_of(self.times, 200),
+                         {'seconds': 200, 'percentile': 60.0, 'runners_faster': 1, 'runners_slower': 2})
+        self.assertEqual(percentile_of(self.times, 250),
+                         {'seconds': 250, 'percentile': 60.0, 'runners_faster': 3, 'runners_slower': 2})
+        self.assertEqual(percentile_of(self.times, 99),
+                         {'seconds': 99, 'percentile': 0.0, 'runners_faster': 0, 'runners_slower': 5})
+        self.assertEqual(percentile_of(self.times, 500),
+                         {'seconds': 500, 'percentile': 100.0, 'runners_faster': 4, 'runners_slower': 0})
+        self.assertEqual(percentile_of([10, 20, 30], 10)['percentile'], 33.33)
+
+    def test_time_at(self):
+        # nearest rank: the ceil(p% of n)th time, and the fastest for 0
+        self.assertEqual([time_at(self.times, p) for p in (0, 20, 21, 40, 60, 61, 80, 99.9, 100)],
+                         [100, 100, 200, 200, 200, 300, 300, 500, 500])
+
+    def test_histogram(self):
+        self.assertEqual(histogram(self.times, 100), {100: 1, 200: 2, 300: 1, 500: 1})
+        self.assertEqual(histogram(self.times, 300), {0: 3, 300: 2})
+        self.assertEqual(histogram(self.times, 1000), {0: 5})
+
+
+class ParseSecondsTests(SimpleTestCase):
+    '''Query string times are H:MM:SS, H:MM or plain seconds.'''
+
+    def test_formats(self):
+        self.assertEqual(parse_seconds('3:45:10'), 13510)
+        self.assertEqual(parse_seconds('3:45'), 13500)     # 3 hours 45 minutes
+        self.assertEqual(parse_seconds('225'), 225)
+
+    def test_invalid_times(self):
+        for text in ('', '3:', '3:60', '3:45:60', '1:2:3:4', '-5', '3.5', 'inf'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_seconds(text)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class PredictionViewTests(TestCase):
+    '''?result= predictions only answer for runners of the selected race.'''
+
+    def setUp(self):
+        self.fitted = Race.objects.create(name='Fitted', slug='fitted')
+        self.unfitted = Race.objects.create(name='Unfitted', slug='unfitted')
+        self.runner = add_result(self.fitted, 1, 3600, 7500)
+        add_result(self.fitted, 2, 4000, 8300)
+        add_result(self.fitted, 3, 5000, 10400)
+        refresh_finish_models(self.fitted)
+        self.stranger = add_result(self.unfitted, 1, 3600, 7200)
+
+    def predict(self, race, result):
+        return self.client.get(reverse('predictions'), {'race': race.slug, 'result': result.pk})
+
+    def test_runner_of_the_race(self):
+        response = self.predict(self.fitted, self.runner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['actual'], 7500)
+
+    def test_runner_of_another_race_is_not_found(self):
+        response = self.predict(self.fitted, self.stranger)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'no such result'})
+
+    def test_race_without_lines_is_not_found(self):
+        response = self.predict(self.unfitted, self.stranger)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'no predictions for this race'})
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class MalformedEventTests(TestCase):
+    '''Bad timing events are rejected one by one, never failing the batch.'''
+
+    def setUp(self):
+        self.race = Race.objects.create(name='Live', slug='live')
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        for patcher in (mock.patch('marathon_analytics.live.LIVE_TIMING_DIR', Path(log_dir.name)),
+                        mock.patch.dict('marathon_analytics.live._live_races', clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_parse_event(self):
+        self.assertEqual(parse_event([7, 'HALF', '9:30:00.5']), (7, 5, 34200500))
+        self.assertEqual(parse_event({'bib': 7, 'checkpoint': 0, 'time': 3600}), (7, 0, 3600000))
+
+    def test_non_finite_values_are_rejected(self):
+        # JSON's 1e400 parses to inf, and float() accepts 'inf' and 'nan'
+        for event in json.loads('[[1, 0, 1e400], [1e400, 0, 60], [1, 0, -1e400]]') + [
+                [1, 0, 'inf'], [1, 0, 'nan'], [1, 0, '1:inf'], [float('nan'), 0, 60]]:
+            with self.subTest(event=event):
+                with self.assertRaises(ValueError):
+                    parse_event(event)
+
+    def test_ingest_reports_each_rejection(self):
+        events = json.loads('''[
+            [1, "START", "8:00:00"],
+            [2, "START", 1e400],
+            [0, "START", "8:00:00"],
+            [3, "MILE 7", "8:00:00"],
+            [4, "FINISH", "25:00:00"],
+            {"bib": 5},
+            "not an event",
+            [6, "5K", 10e400],
+            [1, "5K", "8:20:00"]
+        ]''')
+        accepted, rejected = ingest(self.race, events)
+        self.assertEqual(accepted, 2)
+        self.assertEqual([i for i, _ in rejected], [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(ingest(self.race, [[2, 'START', 'inf']]), (0, [(0, mock.ANY)]))
+
+
+class SortedBoardTests(SimpleTestCase):
+    '''The skip list keeps every width right through random moves.'''
+
+    def assertMatches(self, board, ordered):
+        self.assertEqual(len(board), len(ordered))
+        self.assertEqual(board.top(len(ordered) + 1), ordered)
+        for limit, offset in ((1, 0), (5, 0), (10, 3), (7, len(ordered) - 4), (3, len(ordered) + 2)):
+            self.assertEqual(board.top(limit, offset), ordered[offset:offset + limit])
+        for i, key in enumerate(ordered):
+            self.assertEqual(board.rank(key), i + 1)
+
+    def test_matches_sorted_list(self):
+        rng = random.Random(412)
+        board, ordered, keys = SortedBoard(), [], {}
+        for step in range(2000):
+            bib = rng.randrange(300)
+            # narrow ranges, so many runners share a checkpoint and elapsed time
+            key = SortedBoard.key(bib, rng.randrange(4), rng.randrange(20))
+            if bib in keys and rng.random() < 0.2:
+                board.remove(keys[bib])
+                ordered.remove(keys.pop(bib))
+            else:
+                board.update(keys.get(bib), key)
+                if bib in keys:
+                    ordered.remove(keys[bib])
+                insort(ordered, key)
+                keys[bib] = key
+            if step % 100 == 0:
+                with self.subTest(step=step):
+                    self.assertMatches(board, ordered)
+        self.assertMatches(board, ordered)
+
+    def test_remove_missing_key(self):
+        board = SortedBoard()
+        board.insert(SortedBoard.key(1, 2, 300))
+        with self.assertRaises(KeyError):
+            board.remove(SortedBoard.key(1, 2, 301))
+        self.assertEqual(board.top(5), [SortedBoard.key(1, 2, 300)])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class LiveRaceApplyTests(TestCase):
+    '''A runner's start is set once and they only ever move forward.'''
+
+    HALF = CHECKPOINTS.index('HALF')
+    K30 = CHECKPOINTS.index('30K')
+
+    def setUp(self):
+        race = Race.objects.create(name='Live', slug='live')
+        add_result(race, 1, 3600, 7500)
+        add_result(race, 2, 3700, 7600, gender='M')
+        self.live = LiveRace(race)
+
+    def ranks(self):
+        return [key[2] for key in self.live.boards[('', '')].top(10)]
+
+    def test_repeated_start_is_ignored(self):
+        self.assertTrue(self.live.apply(1, 0, 1000))
+        self.assertFalse(self.live.apply(1, 0, 5000))
+        self.assertTrue(self.live.apply(1, self.HALF, 61000))
+        self.assertEqual(self.live.runners[1][:3], [self.HALF, 61000, 1000])
+        self.assertEqual(self.live.runners[1][3], SortedBoard.key(1, self.HALF, 60000))
+
+    def test_lower_checkpoint_does_not_move_a_runner(self):
+        self.live.apply(1, 0, 0)
+        self.live.apply(2, 0, 0)
+        self.assertTrue(self.live.apply(1, self.K30, 9000))
+        self.assertTrue(self.live.apply(2, self.HALF, 5000))
+        self.assertEqual(self.ranks(), [1, 2])
+
+        key = self.live.runners[1][3]
+        self.assertFalse(self.live.apply(1, self.HALF, 4000))   # a late read from an earlier mat
+        self.assertFalse(self.live.apply(1, self.K30, 8000))    # and a second read of the same one
+        self.assertEqual(self.live.runners[1][3], key)
+        self.assertEqual(self.ranks(), [1, 2])
+        self.assertEqual(len(self.live.boards[('', '')]), 2)
+        self.assertEqual(len(self.live.boards[('F', '')]), 1)
+
+    def test_late_start_retimes_the_runner(self):
+        self.live.apply(2, 0, 0)
+        self.assertTrue(self.live.apply(1, self.HALF, 5000))
+        self.assertEqual(self.live.runners[1][3], SortedBoard.key(1, self.HALF, 5000))  # from the gun
+        self.assertTrue(self.live.apply(1, 0, 1000))
+        self.assertEqual(self.live.runners[1][3], SortedBoard.key(1, self.HALF, 4000))
+        self.assertEqual(len(self.live.boards[('', '')]), 2)
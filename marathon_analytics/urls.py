@@ -7,5 +7,12 @@ urlpatterns = [
     # map the URL (empty string) to the view
 	path(r'', views.ResultsListView.as_view(), name='home'),
     path(r'results', views.ResultsListView.as_view(), name='results_list'),
+    path(r'results/autocomplete', views.ResultAutocompleteView.as_view(), name='results_autocomplete'),
     path(r'result/<int:pk>', views.ResultDetailView.as_view(), name='result_detail'),
+    path(r'distribution', views.DistributionView.as_view(), name='distribution'),
+    path(r'percentiles', views.PercentileView.as_view(), name='percentiles'),
+    path(r'predictions', views.PredictionView.as_view(), name='predictions'),
+    path(r'live/<slug:race>/events', views.LiveEventsView.as_view(), name='live_events'),
+    path(r'live/<slug:race>/leaderboard', views.LeaderboardView.as_view(), name='live_leaderboard'),
+    path(r'live/<slug:race>/feed', views.LiveFeedView.as_view(), name='live_feed'),
 ]
\ No newline at end of file
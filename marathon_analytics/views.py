@@ -1,37 +1,152 @@
+import hmac
+import json
+import threading
+import time
+
+from django.conf import settings
 from django.db.models.query import QuerySet
-from django.shortcuts import render
-from django.views.generic import ListView, DetailView
-from . models import Result
-import plotly
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import ListView, DetailView, TemplateView, View
+from . models import FinishDistribution, Race, Result, normalize
+from .aggregates import finish_summary
+from .result_charts import result_charts
+from .distributions import MEASURES, get_distribution, histogram, percentile_of, time_at
+from .live import get_live_race, ingest
+from .search import prefix_q, search_results
+from .prediction import accuracy_summary, get_finish_models, pacing_consistency, predict_finish
+from cs412.caching import cached
+from cs412.pagination import CachedCountPaginator
+from cs412.charts import cached_figure
 import plotly.graph_objs as go
 
 # Create your views here.
-class ResultsListView(ListView):
+class RaceMixin:
+    """Select the race named by ?race=<slug>, or else the most recent race."""
+
+    @cached_property
+    def race(self):
+        """Return the selected Race; raise Http404 for an unknown slug or when there are no races."""
+        slug = self.request.GET.get('race')
+        races = Race.objects.all()
+        race = races.filter(slug=slug).first() if slug else races.first()
+        if race is None:
+            raise Http404('No such race.')
+        return race
+
+    def get_context_data(self, **kwargs):
+        """Add the selected race and every race (for the race menu) to the context."""
+        context = super().get_context_data(**kwargs)
+        context['race'] = self.race
+        context['races'] = Race.objects.all()
+        return context
+
+
+class ResultsListView(RaceMixin, ListView):
     '''View to display marathon results'''
  
     template_name = 'marathon_analytics/results.html'
     model = Result
     context_object_name = 'results'
     paginate_by = 25
+    paginator_class = CachedCountPaginator
+
+    cache_ttl = 600
     
     def get_queryset(self):
         """Limit the queryset."""
-        # start with entire queryset
-        results = super().get_queryset().order_by('place_overall')
-
-        # filter results by these field(s):
-        if 'city' in self.request.GET:
-            city = self.request.GET['city']
-            if city:
-                results = results.filter(city=city)
-                
-        return results
+        # start with the selected race only; every index leads with race
+        results = super().get_queryset().filter(race=self.race).order_by('place_overall')
+
+        # filter results by these field(s), each through an indexed shadow column:
+        get = self.request.GET
+        bib = None
+        if get.get('bib', '').strip():
+            try:
+                bib = int(get['bib'])
+            except ValueError:
+                return results.none()
+        return search_results(results, bib=bib, last_name=get.get('last_name', ''),
+                              city=get.get('city', ''), state=get.get('state', ''),
+                              ctz=get.get('ctz', ''))
+
+    def get_context_data(self, **kwargs):
+        """Add the search filters, for the form and the page links."""
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        query['race'] = self.race.slug
+        context['query'] = query.urlencode()
+        context['search'] = {field: self.request.GET.get(field, '')
+                             for field in ('bib', 'last_name', 'city', 'state', 'ctz')}
+        context['summary'] = self.summary()
+        return context
+
+    def summary(self):
+        """Return the count and fastest, average and slowest finish of the matching runners."""
+        results = self.object_list
+        if results.query.is_empty():
+            return None
+        summary = cached('marathon:finish_summary', str(results.query), [self.race.results_tag()],
+                         lambda: finish_summary(results), self.cache_ttl)
+        if not summary['count']:
+            return None
+        return {'count': summary['count'], 'fastest': format_seconds(summary['fastest']),
+                'average': format_seconds(round(summary['average'])),
+                'slowest': format_seconds(summary['slowest'])}
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        """Cache the result counts until this race (not any race) is reloaded."""
+        return super().get_paginator(queryset, per_page, orphans, allow_empty_first_page,
+                                     versions=[self.race.results_tag()], **kwargs)
     
+
+class ResultAutocompleteView(RaceMixin, View):
+    """Return the first few runners of a race matching a bib or last name prefix as JSON."""
+
+    # most suggestions returned per request
+    limit = 10
+
+    def get(self, request, *args, **kwargs):
+        """
+        Respond with {"results": [...]} for ?q=: a number matches a bib
+        exactly; otherwise the last word is a last name prefix and any
+        earlier words a first name prefix.
+        """
+        query = normalize(request.GET.get('q', ''))
+        results = Result.objects.filter(race=self.race)
+        if query.isdigit():
+            results = results.filter(bib=int(query))
+        elif len(query) >= 2:
+            *first, last = query.split()
+            results = results.filter(prefix_q('last_name_lower', last))
+            if first:
+                results = results.filter(first_name__istartswith=' '.join(first))
+            # the (race, last_name_lower) index already returns rows in this order
+            results = results.order_by('last_name_lower')
+        else:
+            return JsonResponse({'results': []})
+
+        fields = ('bib', 'first_name', 'last_name', 'city', 'state', 'ctz', 'place_overall')
+        return JsonResponse({'results': [{
+            'id': r.pk,
+            'bib': r.bib,
+            'name': f'{r.first_name} {r.last_name}',
+            'last_name': r.last_name,
+            'place': r.place_overall,
+            'from': ', '.join(part for part in (r.city, r.state, r.ctz) if part),
+            'url': reverse('result_detail', kwargs={'pk': r.pk}),
+        } for r in results.only(*fields)[:self.limit]]})
+
 class ResultDetailView(DetailView):
     '''View to show detail page for one result.'''
  
     template_name = 'marathon_analytics/result_detail.html'
-    model = Result
+    queryset = Result.objects.select_related('race')
     context_object_name = 'r'
 
     def get_context_data(self, **kwargs) :
@@ -41,33 +156,322 @@ class ResultDetailView(DetailView):
         # start with superclass context
         context = super().get_context_data(**kwargs)
         r = context['r']
- 
-        # create graph of first half/second half as pie chart:
-        x = ['first half', 'second half']
-        first_half_seconds = (r.time_half1.hour * 60 + r.time_half1.minute) * 60 + r.time_half1.second
-        second_half_seconds = (r.time_half2.hour * 60 + r.time_half2.minute) * 60 + r.time_half2.second
-        y = [first_half_seconds , second_half_seconds]
-        
-        # generate the Pie chart
-        fig = go.Pie(labels=x, values=y) 
-        title_text = f"Half Marathon Splits"
-        # obtain the graph as an HTML div"
-        graph_div_splits = plotly.offline.plot({"data": [fig], 
-                                         "layout_title_text": title_text,
-                                         }, 
-                                         auto_open=False, 
-                                         output_type="div")
-        # send div as template context variable
-        context['graph_div_splits'] = graph_div_splits
- 
-		# create graph of runners who passed/passed by
-        x= [f'Runners Passed by {r.first_name}', f'Runners who Passed {r.first_name}']
-        y = [r.get_runners_passed(), r.get_runners_passed_by()]
-        
-        fig = go.Bar(x=x, y=y)
-        title_text = f"Runners Passed/Passed By"
-        graph_div_passed = plotly.offline.plot({"data": [fig], 
-                                         "layout_title_text": title_text,
-                                         }, auto_open=False, output_type="div",               
-                                         ) 
-        context['graph_div_passed'] = graph_div_passed
\ No newline at end of file
+
+        # the pie chart of the splits and the passed/passed by bar chart
+        charts = result_charts(r)
+        context['graph_div_splits'] = charts['splits']
+        context['graph_div_passed'] = charts['passed']
+
+        # predicted vs actual finish, from the race's fitted lines
+        prediction = result_prediction(r)
+        if prediction is not None:
+            sign = '+' if prediction['difference'] > 0 else '-' if prediction['difference'] < 0 else ''
+            prediction['clock'] = {
+                'predicted': format_seconds(prediction['predicted']),
+                'actual': format_seconds(prediction['actual']),
+                'difference': sign + format_seconds(abs(prediction['difference'])),
+                'residual_std': format_seconds(prediction['residual_std']),
+            }
+        context['prediction'] = prediction
+        return context
+
+
+def format_seconds(seconds):
+    """Format a number of seconds as H:MM:SS."""
+    return f'{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+
+
+def result_prediction(r):
+    """Return a Result's predicted finish, its difference from the actual finish and pacing score, or None."""
+    prediction = predict_finish(get_finish_models(r.race), r.gender, r.division, r.half1_seconds)
+    if prediction is None:
+        return None
+    difference = r.finish_seconds - prediction['predicted']
+    prediction.update({
+        'actual': r.finish_seconds,
+        'difference': difference,
+        'z_score': round(difference / prediction['residual_std'], 2) if prediction['residual_std'] else 0.0,
+        'pacing_consistency': pacing_consistency(r.half1_seconds, r.half2_seconds),
+    })
+    return prediction
+
+
+class DistributionMixin(RaceMixin):
+    """Read the race, gender, division and measure of a finish-time distribution from the query string."""
+
+    def distribution_params(self):
+        """Return (gender, division, measure); blanks mean every gender/division."""
+        gender = self.request.GET.get('gender', '')
+        division = self.request.GET.get('division', '')
+        measure = self.request.GET.get('measure', 'finish')
+        if measure not in MEASURES:
+            measure = 'finish'
+        return gender, division, measure
+
+
+class PercentileView(DistributionMixin, View):
+    """Answer percentile questions from a precomputed finish-time distribution as JSON."""
+
+    def get(self, request, *args, **kwargs):
+        """
+        Respond with {"runners", "times": [...], "percentiles": [...]}:
+        ?time=H:MM:SS, H:MM or seconds (repeatable) finds where a time places,
+        ?percentile=0-100 (repeatable) finds the time at a percentile.
+        """
+        gender, division, measure = self.distribution_params()
+        times = get_distribution(self.race, gender, division, measure)
+        if not times:
+            return JsonResponse({'error': 'no such distribution'}, status=404)
+
+        try:
+            seconds = [parse_seconds(t) for t in request.GET.getlist('time')]
+            percentiles = [float(p) for p in request.GET.getlist('percentile')]
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if any(not 0 <= p <= 100 for p in percentiles):
+            return JsonResponse({'error': 'percentile must be between 0 and 100'}, status=400)
+
+        return JsonResponse({
+            'race': self.race.slug,
+            'gender': gender,
+            'division': division,
+            'measure': measure,
+            'runners': len(times),
+            'times': [percentile_of(times, s) for s in seconds],
+            'percentiles': [{'percentile': p, 'seconds': time_at(times, p)} for p in percentiles],
+        })
+
+
+def parse_seconds(text):
+    """
+    Convert H:MM:SS, H:MM or a number of seconds into seconds. Race
+    times run to hours, so two parts are hours and minutes: 3:45 is
+    3 hours 45 minutes, not 3 minutes 45 seconds.
+    """
+    parts = text.split(':')
+    if len(parts) > 3 or not all(part.strip().isdigit() for part in parts):
+        raise ValueError(f'invalid time {text!r}')
+    if len(parts) == 1:
+        return int(parts[0])
+    hours, minutes, seconds = (int(part) for part in parts + ['0'] * (3 - len(parts)))
+    if minutes > 59 or seconds > 59:
+        raise ValueError(f'invalid time {text!r}')
+    return (hours * 60 + minutes) * 60 + seconds
+
+
+class PredictionView(RaceMixin, View):
+    """Predict finish times from first-half splits as JSON."""
+
+    cache_ttl = 600
+
+    def get(self, request, *args, **kwargs):
+        """
+        Respond with one runner's prediction for ?result=<pk> (a runner of
+        the selected race), a prediction for ?half1=H:MM:SS or H:MM (with
+        ?gender= and ?division=), or else the race's fitted lines and how
+        accurate they are.
+        """
+        finish_models = get_finish_models(self.race)
+        if not finish_models:
+            return JsonResponse({'error': 'no predictions for this race'}, status=404)
+
+        if request.GET.get('result'):
+            try:
+                r = Result.objects.filter(race=self.race).get(pk=int(request.GET['result']))
+            except (ValueError, Result.DoesNotExist):
+                return JsonResponse({'error': 'no such result'}, status=404)
+            r.race = self.race
+            prediction = result_prediction(r)
+            if prediction is None:
+                return JsonResponse({'error': 'no predictions for this race'}, status=404)
+            return JsonResponse(prediction)
+
+        if request.GET.get('half1'):
+            try:
+                half1 = parse_seconds(request.GET['half1'])
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            return JsonResponse(predict_finish(finish_models, request.GET.get('gender', ''),
+                                               request.GET.get('division', ''), half1))
+
+        accuracy = cached('marathon:prediction_accuracy', self.race.pk, [self.race.results_tag()],
+                          lambda: accuracy_summary(self.race), self.cache_ttl)
+        return JsonResponse({
+            'race': self.race.slug,
+            'models': [{'gender': g, 'division': d, 'slope': slope, 'intercept': intercept,
+                        'residual_std': std, 'runners': n}
+                       for (g, d), (slope, intercept, std, n) in sorted(finish_models.items())],
+            'accuracy': accuracy,
+        })
+
+
+class DistributionView(DistributionMixin, TemplateView):
+    """Show a histogram of one finish-time distribution."""
+
+    template_name = 'marathon_analytics/distribution.html'
+
+    def get_context_data(self, **kwargs):
+        """Provide the histogram and the gender/division choices to the template."""
+        context = super().get_context_data(**kwargs)
+        gender, division, measure = self.distribution_params()
+        times = get_distribution(self.race, gender, division, measure)
+
+        def histogram_figure():
+            counts = histogram(times)
+            x = [f'{start // 3600}:{start // 60 % 60:02d}' for start in counts]
+            return {"data": [go.Bar(x=x, y=list(counts.values()))],
+                    "layout_title_text": f"{measure.title()} Times (5 minute buckets)",
+                    "layout_xaxis_title_text": "time (h:mm)",
+                    "layout_yaxis_title_text": "runners"}
+
+        if times:
+            context['graph_div_histogram'] = cached_figure(
+                'distribution:histogram', f'{self.race.pk}|{gender}|{division}|{measure}',
+                [self.race.results_tag()], histogram_figure)
+            context['median'] = format_seconds(time_at(times, 50))
+        context['runners'] = len(times) if times else 0
+        groups = (FinishDistribution.objects.filter(race=self.race, measure='finish')
+                  .values_list('gender', 'division'))
+        context['genders'] = sorted({g for g, _ in groups if g})
+        context['divisions'] = sorted({d for _, d in groups if d})
+        context['measures'] = list(MEASURES)
+        context['selected'] = {'gender': gender, 'division': division, 'measure': measure}
+        return context
+
+
+class LiveRaceMixin:
+    """Look up the race named in the URL and its live timing state."""
+
+    @cached_property
+    def race(self):
+        return get_object_or_404(Race, slug=self.kwargs['race'])
+
+    @cached_property
+    def live(self):
+        return get_live_race(self.race)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class LiveEventsView(LiveRaceMixin, View):
+    """Accept batches of timing mat events for a race."""
+
+    # largest batch accepted in one request
+    max_events = 10_000
+
+    def post(self, request, *args, **kwargs):
+        """
+        Read {"events": [{"bib", "checkpoint", "time"} or [bib, checkpoint, time], ...]}
+        and respond with {"accepted", "rejected": [{"index", "reason"}]}. An
+        Authorization: Bearer <token> header must match settings.LIVE_TIMING_TOKEN;
+        without that setting every request is refused.
+        """
+        token = getattr(settings, 'LIVE_TIMING_TOKEN', None)
+        if not token:
+            return JsonResponse({'error': 'live timing is not enabled'}, status=403)
+        header = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return JsonResponse({'error': 'invalid token'}, status=403)
+
+        try:
+            events = json.loads(request.body)['events']
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'error': 'expected a JSON object with an events list'}, status=400)
+        if not isinstance(events, list) or len(events) > self.max_events:
+            return JsonResponse({'error': f'events must be a list of at most {self.max_events}'},
+                                status=400)
+
+        accepted, rejected = ingest(self.race, events)
+        return JsonResponse({'accepted': accepted,
+                             'rejected': [{'index': i, 'reason': reason} for i, reason in rejected]})
+
+
+class LeaderboardView(LiveRaceMixin, View):
+    """Return a race's live leaderboard as JSON."""
+
+    max_limit = 200
+
+    def get(self, request, *args, **kwargs):
+        """
+        Respond with {"race", "events", "runners": [...]} for ?gender= and
+        ?division= (with a gender), paged by ?limit= and ?offset=, or with
+        one runner's standing for ?bib=.
+        """
+        if request.GET.get('bib'):
+            try:
+                standing = self.live.standing(int(request.GET['bib']))
+            except ValueError:
+                return JsonResponse({'error': 'invalid bib'}, status=400)
+            if standing is None:
+                return JsonResponse({'error': 'no events for this bib'}, status=404)
+            return JsonResponse(standing)
+
+        try:
+            limit = max(min(int(request.GET.get('limit', 25)), self.max_limit), 1)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return JsonResponse({'error': 'limit and offset must be integers'}, status=400)
+
+        runners = self.live.leaderboard(request.GET.get('gender', ''),
+                                        request.GET.get('division', ''), limit, offset)
+        return JsonResponse({'race': self.race.slug, 'events': self.live.sequence,
+                             'runners': runners})
+
+
+class LiveFeedView(LiveRaceMixin, View):
+    """
+    Return the events logged after a sequence number, either as one JSON
+    poll (?since=N) or as a server-sent event stream (Accept: text/event-stream).
+    """
+
+    # seconds between checks for new events while streaming
+    poll_interval = 1
+
+    # seconds a stream stays open; EventSource reconnects with Last-Event-ID
+    stream_seconds = 30
+
+    # streams held open at once by this process, each tying up a worker thread;
+    # past it, stream requests get the pending events and reconnect later
+    max_streams = getattr(settings, 'LIVE_FEED_MAX_STREAMS', 4)
+    streams = threading.BoundedSemaphore(max_streams)
+
+    # milliseconds an EventSource turned away waits before reconnecting
+    retry_ms = 5000
+
+    def get(self, request, *args, **kwargs):
+        """Respond with {"events": [...], "next": N}, or stream them."""
+        try:
+            since = int(request.headers.get('Last-Event-ID') or request.GET.get('since', 0))
+        except ValueError:
+            return JsonResponse({'error': 'since must be an integer'}, status=400)
+
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            response = StreamingHttpResponse(self.stream(since), content_type='text/event-stream')
+            response['Cache-Control'] = 'no-cache'
+            return response
+
+        events, next_sequence = self.live.events_since(since)
+        return JsonResponse({'events': events, 'next': next_sequence})
+
+    def stream(self, since):
+        """
+        Yield server-sent events for new mat events until stream_seconds
+        pass. If max_streams are already open, yield only the pending
+        events and a retry delay, so the client polls instead.
+        """
+        if not self.streams.acquire(blocking=False):
+            events, since = self.live.events_since(since)
+            yield f'retry: {self.retry_ms}\n\n'
+            if events:
+                yield f'id: {since}\ndata: {json.dumps(events)}\n\n'
+            return
+        try:
+            deadline = time.monotonic() + self.stream_seconds
+            while time.monotonic() < deadline:
+                events, since = self.live.events_since(since)
+                if events:
+                    yield f'id: {since}\ndata: {json.dumps(events)}\n\n'
+                else:
+                    yield ': keep-alive\n\n'
+                    time.sleep(self.poll_interval)
+        finally:
+            self.streams.release()
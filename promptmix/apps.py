@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PromptmixConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'promptmix'
+
+    def ready(self):
+        '''Expire cached page counts whenever prompts, boosts or follows change.'''
+        from cs412.caching import track_writes
+        from .models import Boost, Follow, Prompt
+        track_writes(Prompt, Boost, Follow)
@@ -10,6 +10,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.contrib.auth import login
+from cs412.pagination import CachedCountPaginator
 
 # Create your views here.
 class ProfileDetailView(DetailView):
@@ -323,6 +324,7 @@ class PromptFeedListView(ListView):
     template_name = 'promptmix/show_feed.html'
     context_object_name = 'prompts'
     paginate_by = 5
+    paginator_class = CachedCountPaginator
 
     def get_object(self):
         """Override default method to get object from current user."""
@@ -404,6 +406,7 @@ class FollowedPromptsListView(LoginRequiredMixin, ListView):
     template_name = 'promptmix/show_followed.html'
     context_object_name = 'prompts'
     paginate_by = 5
+    paginator_class = CachedCountPaginator
 
     def get_login_url(self) -> str:
         '''return the URL required for login'''
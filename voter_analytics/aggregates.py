@@ -0,0 +1,294 @@
+# file: voter_analytics/aggregates.py
+# author: Cody Headings, codyh@bu.edu, 10/31/2025
+# desc: database-side aggregation of voter counts for the graphs page,
+#       and maintenance of the precomputed summary tables
+
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractYear
+
+from .models import HouseholdSummary, PrecinctSummary, Voter, VoterSummary
+
+# the election participation columns, in display order
+ELECTIONS = ['v20state', 'v21town', 'v21primary', 'v22general', 'v23town']
+
+
+def election_mask(flags):
+    '''Pack a sequence of five election flags into the VoterSummary bitmask.'''
+    mask = 0
+    for i, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << i
+    return mask
+
+
+def voter_graph_counts(voters):
+    '''
+    Count a (filtered) Voter queryset by birth year, by party and by
+    participation in each election, using a single grouped query.
+    Returns a dict with keys 'total', 'years', 'parties' and 'elections'.
+    '''
+    rows = (voters.order_by()
+            .values('party', year=ExtractYear('dob'))
+            .annotate(n=Count('pk'),
+                      **{e: Count('pk', filter=Q(**{e: True})) for e in ELECTIONS}))
+
+    counts = {
+        'total': 0,
+        'years': {},
+        'parties': {},
+        'elections': {e: 0 for e in ELECTIONS},
+    }
+
+    # roll the (year, party) groups up into the three charts
+    for row in rows:
+        n = row['n']
+        counts['total'] += n
+        counts['years'][row['year']] = counts['years'].get(row['year'], 0) + n
+        counts['parties'][row['party']] = counts['parties'].get(row['party'], 0) + n
+        for e in ELECTIONS:
+            counts['elections'][e] += row[e]
+
+    counts['years'] = dict(sorted(counts['years'].items()))
+    return counts
+
+
+def summary_key(voter):
+    '''Return the VoterSummary cell (party, score, year, mask) for a Voter.'''
+    return (voter.party, voter.voter_score, voter.dob.year,
+            election_mask([getattr(voter, e) for e in ELECTIONS]))
+
+
+def summary_keys(voters):
+    '''Return a Counter of VoterSummary cells for a Voter queryset.'''
+    rows = (voters.order_by()
+            .values('party', 'voter_score', *ELECTIONS, year=ExtractYear('dob'))
+            .annotate(n=Count('pk')))
+
+    cells = Counter()
+    for row in rows:
+        mask = election_mask([row[e] for e in ELECTIONS])
+        cells[(row['party'], row['voter_score'], row['year'], mask)] += row['n']
+    return cells
+
+
+def refresh_voter_summary():
+    '''Rebuild the whole VoterSummary table from the Voter table.'''
+    cells = summary_keys(Voter.objects.all())
+    with transaction.atomic():
+        VoterSummary.objects.all().delete()
+        VoterSummary.objects.bulk_create(
+            VoterSummary(party=party, voter_score=score, birth_year=year,
+                         elections=mask, count=n)
+            for (party, score, year, mask), n in cells.items())
+    return len(cells)
+
+
+class SummaryDelta:
+    '''
+    Accumulates +/- changes to VoterSummary cells during a delta import
+    and applies them at the end, touching only the affected cells.
+    '''
+
+    def __init__(self):
+        self.changes = Counter()
+
+    def add(self, voters):
+        '''Count new or updated Voter instances.'''
+        for voter in voters:
+            self.changes[summary_key(voter)] += 1
+
+    def remove(self, voters):
+        '''Uncount the stored versions of a Voter queryset.'''
+        self.changes.subtract(summary_keys(voters))
+
+    def apply(self):
+        '''Write the accumulated changes to the VoterSummary table.'''
+        # (party, score, year, mask) -> (pk, count) of the stored cells
+        current = {(party, score, year, mask): (pk, n) for pk, party, score, year, mask, n in
+                   VoterSummary.objects.values_list('pk', 'party', 'voter_score',
+                                                    'birth_year', 'elections', 'count')}
+
+        changed = []
+        emptied = []
+        for key, n in self.changes.items():
+            if n == 0:
+                continue
+            pk, stored = current.get(key, (None, 0))
+            if stored + n > 0:
+                party, score, year, mask = key
+                changed.append(VoterSummary(party=party, voter_score=score, birth_year=year,
+                                            elections=mask, count=stored + n))
+            elif pk is not None:
+                emptied.append(pk)
+
+        with transaction.atomic():
+            VoterSummary.objects.bulk_create(changed, update_conflicts=True,
+                                             unique_fields=['party', 'voter_score',
+                                                            'birth_year', 'elections'],
+                                             update_fields=['count'])
+            VoterSummary.objects.filter(pk__in=emptied).delete()
+        self.changes.clear()
+
+
+def summary_graph_counts(party=None, voter_score=None, elections=(),
+                         min_year=None, max_year=None):
+    '''
+    Answer the graphs page from the VoterSummary table. elections lists
+    the election columns the voters must have taken part in.
+    Returns the same structure as voter_graph_counts().
+    '''
+    cells = VoterSummary.objects.all()
+    if party:
+        cells = cells.filter(party=party)
+    if voter_score is not None:
+        cells = cells.filter(voter_score=voter_score)
+    if min_year is not None:
+        cells = cells.filter(birth_year__gte=min_year)
+    if max_year is not None:
+        cells = cells.filter(birth_year__lte=max_year)
+    required = election_mask([e in elections for e in ELECTIONS])
+    if required:
+        cells = cells.annotate(required=F('elections').bitand(required)).filter(required=required)
+
+    counts = {
+        'total': 0,
+        'years': {},
+        'parties': {},
+        'elections': {e: 0 for e in ELECTIONS},
+    }
+
+    for party, year, mask, n in cells.values_list('party', 'birth_year', 'elections', 'count'):
+        counts['total'] += n
+        counts['years'][year] = counts['years'].get(year, 0) + n
+        counts['parties'][party] = counts['parties'].get(party, 0) + n
+        for i, e in enumerate(ELECTIONS):
+            if mask & (1 << i):
+                counts['elections'][e] += n
+
+    counts['years'] = dict(sorted(counts['years'].items()))
+    return counts
+
+
+def summary_facet_cells(min_year=None, max_year=None):
+    '''
+    Return a Counter of voters per (party, voter score, election mask)
+    born in the year range, from the VoterSummary table.
+    '''
+    cells = VoterSummary.objects.order_by()
+    if min_year is not None:
+        cells = cells.filter(birth_year__gte=min_year)
+    if max_year is not None:
+        cells = cells.filter(birth_year__lte=max_year)
+    rows = cells.values_list('party', 'voter_score', 'elections').annotate(n=Sum('count'))
+    return Counter({(party, score, mask): n for party, score, mask, n in rows})
+
+
+def voter_facet_cells(voters):
+    '''Return a Counter of a Voter queryset per (party, voter score, election mask).'''
+    rows = (voters.order_by()
+            .values('party', 'voter_score', *ELECTIONS)
+            .annotate(n=Count('pk')))
+
+    cells = Counter()
+    for row in rows:
+        mask = election_mask([row[e] for e in ELECTIONS])
+        cells[(row['party'], row['voter_score'], mask)] += row['n']
+    return cells
+
+
+def facet_counts(cells, party=None, voter_score=None, required=0, excluded=0):
+    '''
+    Count the search form options for one filter state in a single pass
+    over (party, voter score, election mask) cells. Each party (or score)
+    count is the number of voters the search would return with that
+    party (or score) selected instead; each election count is the number
+    it would return with that election also ticked.
+    '''
+    parties = Counter()
+    scores = Counter()
+    elections = {e: 0 for e in ELECTIONS}
+
+    for (p, score, mask), n in cells.items():
+        party_ok = party is None or p == party
+        score_ok = voter_score is None or score == voter_score
+        elections_ok = (mask & required) == required and not mask & excluded
+        if score_ok and elections_ok:
+            parties[p] += n
+        if party_ok and elections_ok:
+            scores[score] += n
+        if party_ok and score_ok and elections_ok:
+            for i, e in enumerate(ELECTIONS):
+                if mask & (1 << i):
+                    elections[e] += n
+
+    return {'party': dict(parties), 'vscore': dict(scores), 'elections': elections}
+
+
+def refresh_precinct_rollups():
+    '''
+    Rebuild the PrecinctSummary and HouseholdSummary tables from the
+    Voter table with two grouped queries. Returns the number of precincts.
+    '''
+    parties = (Voter.objects.order_by()
+               .values('precinct', 'party')
+               .annotate(voters=Count('pk'),
+                         **{e: Count('pk', filter=Q(**{e: True})) for e in ELECTIONS}))
+
+    # households are grouped by (precinct, household_key), then by size
+    households = Counter()
+    rows = (Voter.objects.order_by()
+            .values('precinct', 'household_key')
+            .annotate(size=Count('pk'))
+            .values_list('precinct', 'size'))
+    for precinct, size in rows.iterator(chunk_size=5000):
+        households[(precinct, size)] += 1
+
+    with transaction.atomic():
+        PrecinctSummary.objects.all().delete()
+        PrecinctSummary.objects.bulk_create(PrecinctSummary(**row) for row in parties)
+        HouseholdSummary.objects.all().delete()
+        HouseholdSummary.objects.bulk_create(
+            HouseholdSummary(precinct=precinct, size=size, households=n)
+            for (precinct, size), n in households.items())
+    return len({precinct for precinct, _ in households})
+
+
+def precinct_rollups(precinct=None):
+    '''
+    Return turnout, party and household-size rollups per precinct from
+    the summary tables, as a JSON-serializable list ordered by precinct.
+    '''
+    rows = PrecinctSummary.objects.order_by('precinct', 'party')
+    sizes = HouseholdSummary.objects.order_by('precinct', 'size')
+    if precinct is not None:
+        rows = rows.filter(precinct=precinct)
+        sizes = sizes.filter(precinct=precinct)
+
+    precincts = {}
+    for row in rows:
+        p = precincts.setdefault(row.precinct, {
+            'precinct': row.precinct,
+            'voters': 0,
+            'households': 0,
+            'turnout': {e: 0 for e in ELECTIONS},
+            'parties': {},
+            'household_sizes': {},
+        })
+        p['voters'] += row.voters
+        p['parties'][row.party.strip()] = {'voters': row.voters,
+                                           **{e: getattr(row, e) for e in ELECTIONS}}
+        for e in ELECTIONS:
+            p['turnout'][e] += getattr(row, e)
+
+    for row in sizes:
+        if row.precinct in precincts:
+            precincts[row.precinct]['households'] += row.households
+            precincts[row.precinct]['household_sizes'][row.size] = row.households
+
+    for p in precincts.values():
+        p['turnout_rate'] = {e: round(n / p['voters'], 4) if p['voters'] else 0.0
+                             for e, n in p['turnout'].items()}
+    return list(precincts.values())
@@ -0,0 +1,129 @@
+# file: voter_analytics/benchmark.py
+# author: Cody Headings, codyh@bu.edu, 11/07/2025
+# desc: timing of the voter import and pages, for comparing releases
+
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cs412.pagination import KeysetPaginator
+from .importer import import_voters
+from .models import Voter
+
+# (name, query string) of the filter combinations timed on the graphs page
+GRAPH_FILTERS = [
+    ('graphs', {}),
+    ('graphs_party', {'party': 'D '}),
+    ('graphs_score_election', {'vscore': '4', 'v22general': 'TRUE'}),
+    ('graphs_dob_range', {'min_dob': '1950', 'max_dob': '1970'}),
+    ('graphs_not_voted', {'v21town': 'FALSE', 'party': 'U '}),
+    ('graphs_search', {'q': 'sm'}),
+]
+
+# (name, query string) of the filtered voter list pages timed
+LIST_FILTERS = [
+    ('list_party_score', {'party': 'R ', 'vscore': '2'}),
+    ('list_search', {'q': 'smith wash'}),
+]
+
+
+def clear_caches():
+    '''Empty every configured cache so the next request runs cold.'''
+    for cache in caches.all():
+        cache.clear()
+
+
+def time_request(client, url, params=None, repeat=5):
+    '''
+    Request a page once with empty caches and then repeat times warm.
+    Returns a dict of timings in milliseconds and the warm query count.
+    '''
+    clear_caches()
+    start = time.perf_counter()
+    response = client.get(url, params or {})
+    cold = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        raise RuntimeError(f'{url} returned {response.status_code}')
+
+    warm = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            client.get(url, params or {})
+            warm.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'cold_ms': round(cold, 2),
+        'warm_median_ms': round(statistics.median(warm), 2),
+        'warm_min_ms': round(min(warm), 2),
+        'warm_queries': len(queries),
+        'bytes': len(response.content),
+    }
+
+
+def deep_cursor(position):
+    '''Return the keyset cursor of the voter list page starting at position.'''
+    paginator = KeysetPaginator(Voter.objects.all(), 100, ordering=('dob', 'id'))
+    voter = Voter.objects.order_by('dob', 'id')[position - 1]
+    return paginator.encode_cursor(voter, 'next', position // 100 + 1)
+
+
+def run_benchmarks(filename, repeat=5, log=None):
+    '''
+    Load filename with import_voters() and time the voter pages against
+    it. Returns a JSON-serializable dict of the results. Replaces every
+    Voter, so only run it against a scratch database.
+    '''
+    log = log or (lambda message: None)
+    results = {}
+
+    log('import...')
+    stats = import_voters(filename)
+    results['import'] = {
+        'rows': stats.inserted,
+        'seconds': round(stats.elapsed, 3),
+        'rows_per_second': round(stats.rate()),
+    }
+    rows = stats.inserted
+
+    client = Client()
+    pages = [
+        ('list_first_page', reverse('voters'), {}),
+        ('list_deep_offset', reverse('voters'), {'page': max(1, rows // 100 // 2)}),
+        ('list_deep_keyset', reverse('voters'), {'cursor': deep_cursor(max(1, rows // 2))}),
+        *[(name, reverse('voters'), params) for name, params in LIST_FILTERS],
+        *[(name, reverse('graphs'), params) for name, params in GRAPH_FILTERS],
+        ('histogram_party', reverse('histogram'), {'party': 'D '}),
+    ]
+    for name, url, params in pages:
+        log(f'{name}...')
+        results[name] = time_request(client, url, params, repeat)
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'rows': rows,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def git_commit():
+    '''Return the checked-out git commit, or None outside a git checkout.'''
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
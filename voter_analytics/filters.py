@@ -0,0 +1,205 @@
+# file: voter_analytics/filters.py
+# author: Cody Headings, codyh@bu.edu, 11/03/2025
+# desc: declarative search filters shared by the voter list and graphs pages
+
+from datetime import date
+
+from cs412.caching import cached
+from .aggregates import (ELECTIONS, election_mask, facet_counts, summary_facet_cells,
+                         summary_graph_counts, voter_facet_cells, voter_graph_counts)
+from .models import Voter, VoterSearchTerm, VoterSummary
+from .search import search_voters
+from .snapshot import get_snapshot
+
+# seconds a cached result for one filter combination is kept
+FILTER_CACHE_TTL = 600
+
+# party codes offered by the search form, in display order
+PARTIES = ['D ', 'R ', 'U ', 'CC', 'AA', 'A ', 'L ', 'J ', 'Q ', 'S ', 'FF', 'T ', 'GG',
+           'O ', 'P ', 'E ', 'V ', 'H ', 'EE', 'K ', 'W ', 'X ', 'Y ', 'Z ']
+
+# voter scores offered by the search form
+SCORES = range(0, 6)
+
+
+def parse_party(value):
+    '''Party codes are stored as two characters, e.g. "D " or "CC".'''
+    party = value.strip().upper()
+    if not party or len(party) > 2:
+        raise ValueError(value)
+    return party.ljust(2)
+
+
+def parse_score(value):
+    score = int(value)
+    if score < 0:
+        raise ValueError(value)
+    return score
+
+
+def parse_flag(value):
+    if value.upper() not in ('TRUE', 'FALSE'):
+        raise ValueError(value)
+    return value.upper() == 'TRUE'
+
+
+def parse_query(value):
+    query = ' '.join(value.split())
+    if not query:
+        raise ValueError(value)
+    return query[:100]
+
+
+def parse_year(value):
+    year = int(value)
+    if not 1800 <= year <= 2100:
+        raise ValueError(value)
+    return year
+
+
+class Filter:
+    '''
+    One search form parameter: how to validate it and which queryset
+    lookup it becomes. to_lookup converts the parsed value for the query;
+    a filter that is not a single lookup passes apply(queryset, value)
+    instead.
+    '''
+
+    def __init__(self, param, parse, lookup=None, to_lookup=None, apply=None):
+        self.param = param
+        self.parse = parse
+        self.lookup = lookup
+        self.to_lookup = to_lookup or (lambda value: value)
+        self.apply = apply or (lambda qs, value: qs.filter(**{self.lookup: self.to_lookup(value)}))
+
+
+# every filter the search forms offer, in canonical order
+VOTER_FILTERS = [
+    Filter('party', parse_party, 'party'),
+    Filter('vscore', parse_score, 'voter_score'),
+    *[Filter(e, parse_flag, e) for e in ELECTIONS],
+    Filter('min_dob', parse_year, 'dob__gte', lambda year: date(year, 1, 1)),
+    Filter('max_dob', parse_year, 'dob__lte', lambda year: date(year, 12, 31)),
+    Filter('q', parse_query, apply=search_voters),
+]
+
+
+class VoterFilter:
+    '''
+    The validated, normalized filters from one request. Parameters that
+    are missing, blank or invalid are ignored. Two requests with the same
+    filters share a key(), so results cached under it are reused between
+    the list and graphs pages.
+    '''
+
+    def __init__(self, params):
+        self.values = {}
+        for f in VOTER_FILTERS:
+            value = params.get(f.param)
+            if not value:
+                continue
+            try:
+                self.values[f.param] = f.parse(value)
+            except ValueError:
+                pass
+
+    def key(self):
+        '''Return the canonical signature of these filters.'''
+        return '&'.join(f'{param}={value}' for param, value in self.values.items())
+
+    def apply(self, voters):
+        '''Filter a Voter queryset.'''
+        for f in VOTER_FILTERS:
+            if f.param in self.values:
+                voters = f.apply(voters, self.values[f.param])
+        return voters
+
+    def summary_filters(self):
+        '''
+        Return these filters as summary_graph_counts() arguments, or None
+        if they cannot be answered from the VoterSummary table.
+        '''
+        if 'q' in self.values or any(self.values.get(e) is False for e in ELECTIONS):
+            return None
+        return {
+            'party': self.values.get('party'),
+            'voter_score': self.values.get('vscore'),
+            'elections': [e for e in ELECTIONS if self.values.get(e)],
+            'min_year': self.values.get('min_dob'),
+            'max_year': self.values.get('max_dob'),
+        }
+
+    def snapshot_filters(self):
+        '''
+        Return these filters as VoterSnapshot.select() arguments, or None
+        if they cannot be answered from the snapshot.
+        '''
+        if 'q' in self.values:
+            return None
+        return {
+            'party': self.values.get('party'),
+            'voter_score': self.values.get('vscore'),
+            'required': election_mask([self.values.get(e) is True for e in ELECTIONS]),
+            'excluded': election_mask([self.values.get(e) is False for e in ELECTIONS]),
+            'min_year': self.values.get('min_dob'),
+            'max_year': self.values.get('max_dob'),
+        }
+
+    def cached(self, name, compute):
+        '''Return compute() for these filters, cached until the voter data changes.'''
+        return cached(f'voters:{name}', self.key(), [Voter, VoterSummary, VoterSearchTerm], compute,
+                      FILTER_CACHE_TTL)
+
+    def graph_counts(self):
+        '''Return the graphs page counts (see voter_graph_counts) for these filters.'''
+        # the in-memory snapshot answers in a few milliseconds; no need to cache it
+        filters = self.snapshot_filters()
+        if filters is not None:
+            snapshot = get_snapshot()
+            if snapshot is not None:
+                return snapshot.graph_counts(**filters)
+
+        def compute():
+            filters = self.summary_filters()
+            if filters is not None and VoterSummary.objects.exists():
+                return summary_graph_counts(**filters)
+            return voter_graph_counts(self.apply(Voter.objects.all()))
+        return self.cached('graph_counts', compute)
+
+    def count(self):
+        '''Return the number of matching Voters.'''
+        return self.graph_counts()['total']
+
+    def facet_counts(self):
+        '''
+        Return the search form option counts (see aggregates.facet_counts)
+        for these filters, from one grouped query.
+        '''
+        def compute():
+            if 'q' not in self.values and VoterSummary.objects.exists():
+                cells = summary_facet_cells(self.values.get('min_dob'), self.values.get('max_dob'))
+            else:
+                # every filter that is not itself a facet narrows the voters grouped
+                base = VoterFilter({})
+                base.values = {param: value for param, value in self.values.items()
+                               if param in ('q', 'min_dob', 'max_dob')}
+                cells = voter_facet_cells(base.apply(Voter.objects.all()))
+            return facet_counts(
+                cells,
+                party=self.values.get('party'),
+                voter_score=self.values.get('vscore'),
+                required=election_mask([self.values.get(e) is True for e in ELECTIONS]),
+                excluded=election_mask([self.values.get(e) is False for e in ELECTIONS]))
+        return self.cached('facets', compute)
+
+    def facet_options(self):
+        '''Return the search form options with their counts, for the template.'''
+        counts = self.facet_counts()
+        return {
+            'party': [{'value': p, 'label': p.strip(), 'count': counts['party'].get(p, 0),
+                       'selected': self.values.get('party') == p} for p in PARTIES],
+            'vscore': [{'value': str(score), 'label': str(score), 'count': counts['vscore'].get(score, 0),
+                        'selected': self.values.get('vscore') == score} for score in SCORES],
+            'elections': [{'value': e, 'label': e, 'count': counts['elections'][e],
+                           'selected': self.values.get(e) is True} for e in ELECTIONS],
+        }
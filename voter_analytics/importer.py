@@ -0,0 +1,253 @@
+# file: voter_analytics/importer.py
+# author: Cody Headings, codyh@bu.edu, 10/30/2025
+# desc: streaming bulk importer for the Newton voter CSV file
+
+import csv
+import hashlib
+from datetime import date
+
+from django.db import transaction
+
+from cs412.caching import invalidate
+from cs412.importing import ImportStats, ImportTarget, register
+
+from .aggregates import ELECTIONS, SummaryDelta, refresh_precinct_rollups, refresh_voter_summary
+from .models import (HouseholdSummary, PrecinctSummary, Voter, VoterSearchTerm, VoterSummary,
+                     household_key)
+from .search import index_voters, rebuild_search_index, unindex_voters
+
+DEFAULT_BATCH_SIZE = 5000
+
+# columns rewritten when a changed row is updated by a delta import
+UPDATE_FIELDS = ['first_name', 'last_name', 'address_number', 'address_street',
+                 'address_apt_number', 'address_zip', 'dob', 'date_registered',
+                 'party', 'precinct', 'v20state', 'v21town', 'v21primary',
+                 'v22general', 'v23town', 'voter_score', 'row_hash', 'household_key']
+
+
+def parse_date(text):
+    '''Convert a YYYY-MM-DD string from the CSV into a date.'''
+    return date.fromisoformat(text.strip())
+
+
+def parse_flag(text):
+    '''Convert a TRUE/FALSE election column from the CSV into a bool.'''
+    flag = text.strip().upper()
+    if flag not in ('TRUE', 'FALSE'):
+        raise ValueError(f'invalid election flag {text!r}')
+    return flag == 'TRUE'
+
+
+def row_hash(fields):
+    '''Return a stable content hash of the 17 data columns of a CSV row.'''
+    return hashlib.sha1('\x1f'.join(fields[:17]).encode('utf-8')).hexdigest()
+
+
+def voter_from_row(fields):
+    '''
+    Build an (unsaved) Voter from one row of the CSV file.
+    Raises ValueError if the row is malformed.
+    '''
+    if len(fields) < 17:
+        raise ValueError(f'expected 17 columns, found {len(fields)}')
+
+    voter_id = fields[0].strip()
+    if not voter_id:
+        raise ValueError('missing voter id')
+
+    party = fields[9]
+    if len(party) > 2:
+        raise ValueError(f'invalid party code {party!r}')
+
+    return Voter(voter_id=voter_id,
+                 last_name=fields[1],
+                 first_name=fields[2],
+                 address_number=fields[3],
+                 address_street=fields[4],
+                 address_apt_number=fields[5],
+                 address_zip=fields[6],
+                 dob=parse_date(fields[7]),
+                 date_registered=parse_date(fields[8]),
+                 party=party,
+                 precinct=fields[10],
+                 v20state=parse_flag(fields[11]),
+                 v21town=parse_flag(fields[12]),
+                 v21primary=parse_flag(fields[13]),
+                 v22general=parse_flag(fields[14]),
+                 v23town=parse_flag(fields[15]),
+                 voter_score=int(fields[16]),
+                 row_hash=row_hash(fields),
+                 household_key=household_key(*fields[3:7]),
+                 )
+
+
+def voter_from_record(record):
+    '''
+    Build an (unsaved) Voter from a dict of typed column values, e.g. a
+    Parquet row. row_hash and household_key are computed if absent.
+    '''
+    voter = Voter(**record)
+    if voter.voter_id is None or not voter.voter_id.strip():
+        raise ValueError('missing voter id')
+    if len(voter.party) > 2:
+        raise ValueError(f'invalid party code {voter.party!r}')
+    if not voter.household_key:
+        voter.household_key = household_key(voter.address_number, voter.address_street,
+                                            voter.address_apt_number, voter.address_zip)
+    if not voter.row_hash:
+        # hash the row as it would appear in the CSV file
+        voter.row_hash = row_hash([
+            voter.voter_id, voter.last_name, voter.first_name, voter.address_number,
+            voter.address_street, voter.address_apt_number, voter.address_zip,
+            voter.dob.isoformat(), voter.date_registered.isoformat(), voter.party,
+            voter.precinct, *['TRUE' if getattr(voter, e) else 'FALSE' for e in ELECTIONS],
+            str(voter.voter_score)])
+    return voter
+
+
+def read_batches(filename, batch_size, stats):
+    '''
+    Stream the CSV file and yield lists of at most batch_size Voters.
+    Malformed rows and repeated voter ids are recorded on stats and skipped.
+    '''
+    seen = set()
+    with open(filename, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # discard headers
+
+        batch = []
+        for fields in reader:
+            try:
+                voter = voter_from_row(fields)
+            except (ValueError, IndexError) as e:
+                stats.reject(reader.line_num, e)
+                continue
+
+            if voter.voter_id in seen:
+                stats.reject(reader.line_num, f'duplicate voter id {voter.voter_id}')
+                continue
+            seen.add(voter.voter_id)
+
+            batch.append(voter)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def import_voters(filename, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Replace all Voter records with the contents of the CSV file.
+    Rows are written with bulk_create, one transaction per batch.
+    Returns an ImportStats describing the run.
+    '''
+    stats = ImportStats('Voters')
+
+    # delete existing records to prevent duplicates:
+    stats.deleted = delete_voters()
+
+    for batch in read_batches(filename, batch_size, stats):
+        with transaction.atomic():
+            Voter.objects.bulk_create(batch, batch_size=batch_size)
+        stats.inserted += len(batch)
+
+    rebuild_derived_tables(batch_size)
+
+    stats.finish()
+    return stats
+
+
+def delete_voters():
+    '''Delete every Voter and its search terms. Returns the number of Voters deleted.'''
+    VoterSearchTerm.objects.all().delete()
+    deleted, _ = Voter.objects.all().delete()
+    return deleted
+
+
+def rebuild_derived_tables(batch_size=DEFAULT_BATCH_SIZE):
+    '''Rebuild the summaries and search index after the Voter table was reloaded.'''
+    refresh_voter_summary()
+    refresh_precinct_rollups()
+    rebuild_search_index(batch_size)
+    invalidate(Voter, VoterSummary, VoterSearchTerm, PrecinctSummary, HouseholdSummary)
+
+
+def import_voters_delta(filename, batch_size=DEFAULT_BATCH_SIZE):
+    '''
+    Bring the Voter table in line with the CSV file without emptying it.
+    Rows are matched on voter_id: new rows are inserted, rows whose hash
+    changed are updated, and Voters missing from the file are deleted.
+    Returns an ImportStats describing the run.
+    '''
+    stats = ImportStats('Voters')
+    summary = SummaryDelta()
+    # an empty summary table cannot be patched; rebuild it at the end instead
+    incremental = VoterSummary.objects.exists() or not Voter.objects.exists()
+
+    # voter_id -> (pk, row_hash) for every Voter currently stored
+    existing = {voter_id: (pk, digest) for pk, voter_id, digest in
+                Voter.objects.filter(voter_id__isnull=False)
+                .values_list('pk', 'voter_id', 'row_hash').iterator(chunk_size=batch_size)}
+
+    for batch in read_batches(filename, batch_size, stats):
+        inserts = []
+        updates = []
+        for voter in batch:
+            match = existing.pop(voter.voter_id, None)
+            if match is None:
+                inserts.append(voter)
+            elif match[1] != voter.row_hash:
+                updates.append(voter)
+            else:
+                stats.unchanged += 1
+
+        summary.remove(Voter.objects.filter(voter_id__in=[v.voter_id for v in updates]))
+        summary.add(inserts)
+        summary.add(updates)
+
+        # changed rows are upserted on voter_id so they keep their pk
+        with transaction.atomic():
+            Voter.objects.bulk_create(inserts, batch_size=batch_size)
+            Voter.objects.bulk_create(updates, batch_size=batch_size,
+                                      update_conflicts=True,
+                                      unique_fields=['voter_id'],
+                                      update_fields=UPDATE_FIELDS)
+        changed = [v.voter_id for v in inserts + updates]
+        if changed:
+            index_voters(Voter.objects.filter(voter_id__in=changed), batch_size)
+        stats.inserted += len(inserts)
+        stats.updated += len(updates)
+
+    # whatever is left in existing was not in the file; also retire rows
+    # loaded before voter ids were recorded
+    retired = [pk for pk, _ in existing.values()]
+    for i in range(0, len(retired), batch_size):
+        chunk = Voter.objects.filter(pk__in=retired[i:i + batch_size])
+        summary.remove(chunk)
+        with transaction.atomic():
+            unindex_voters(retired[i:i + batch_size])
+            deleted, _ = chunk.delete()
+        stats.deleted += deleted
+    legacy = Voter.objects.filter(voter_id__isnull=True)
+    summary.remove(legacy)
+    unindex_voters(legacy.values('pk'))
+    deleted, _ = legacy.delete()
+    stats.deleted += deleted
+
+    if incremental:
+        summary.apply()
+    else:
+        refresh_voter_summary()
+    refresh_precinct_rollups()
+    invalidate(Voter, VoterSummary, VoterSearchTerm, PrecinctSummary, HouseholdSummary)
+
+    stats.finish()
+    return stats
+
+
+# lets manage.py parallel_import and import_columnar load the voter file
+register(ImportTarget('voters', Voter, voter_from_row, 'Voters', unique_field='voter_id',
+                      before=delete_voters, after=rebuild_derived_tables,
+                      from_record=voter_from_record))
@@ -0,0 +1,87 @@
+# file: voter_analytics/management/commands/benchmark_voters.py
+# author: Cody Headings, codyh@bu.edu, 11/07/2025
+# desc: manage.py command to time the voter import and pages on synthetic data
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from voter_analytics.benchmark import run_benchmarks
+from voter_analytics.synthetic import write_synthetic_csv
+from .generate_voters import parse_count
+
+
+class Command(BaseCommand):
+    help = ('Time the voter import, list and graphs pages against a synthetic data set, '
+            'in a scratch test database. Results can be written as JSON for comparison.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=parse_count, default=50_000,
+                            help='number of synthetic voters to generate (default 50k)')
+        parser.add_argument('--csv', help='benchmark this voter CSV file instead of generating one')
+        parser.add_argument('--seed', type=int, default=0, help='random seed for the synthetic data')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='warm requests timed per page (default 5)')
+        parser.add_argument('--output', help='write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        filename = options['csv']
+        generated = None
+        if filename is None:
+            fd, generated = tempfile.mkstemp(suffix='.csv')
+            os.close(fd)
+            self.stderr.write(f'Generating {options["rows"]:,} voters...')
+            write_synthetic_csv(generated, options['rows'], options['seed'])
+            filename = generated
+
+        # never touch the real database: the import replaces every Voter.
+        # SQLite test databases default to memory, which would hide disk
+        # costs, so the scratch database gets a file of its own.
+        old_name = connection.settings_dict['NAME']
+        test_settings = connection.settings_dict['TEST']
+        old_test_name = test_settings.get('NAME')
+        scratch_dir = None
+        if connection.vendor == 'sqlite' and not old_test_name:
+            scratch_dir = tempfile.mkdtemp(prefix='benchmark_voters')
+            test_settings['NAME'] = os.path.join(scratch_dir, 'benchmark.sqlite3')
+
+        # nor the shared caches: the scratch data would be cached under the
+        # same version tokens the web server reads, and each cold request
+        # clears every cache
+        local_caches = {alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                'LOCATION': f'benchmark-{alias}',
+                                'OPTIONS': config.get('OPTIONS', {})}
+                        for alias, config in settings.CACHES.items()}
+
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CACHES=local_caches):
+                report = run_benchmarks(filename, options['repeat'], log=self.stderr.write)
+        except OSError as e:
+            raise CommandError(f'Could not read {filename}: {e}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            test_settings['NAME'] = old_test_name
+            if scratch_dir:
+                shutil.rmtree(scratch_dir, ignore_errors=True)
+            if generated:
+                os.remove(generated)
+
+        for name, result in report['results'].items():
+            self.stdout.write(f'{name:28} ' + '  '.join(f'{k}={v}' for k, v in result.items()))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}.')
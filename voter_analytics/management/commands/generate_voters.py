@@ -0,0 +1,41 @@
+# file: voter_analytics/management/commands/generate_voters.py
+# author: Cody Headings, codyh@bu.edu, 11/07/2025
+# desc: manage.py command to write a synthetic voter CSV file
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voter_analytics.synthetic import write_synthetic_csv
+
+
+def parse_count(value):
+    '''Accept row counts like 50000, 50k or 1M.'''
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    value = value.strip().lower().replace('_', '')
+    if value and value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+class Command(BaseCommand):
+    help = 'Write a synthetic Newton-style voter CSV file that import_voters can load.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='path of the CSV file to write')
+        parser.add_argument('--rows', type=parse_count, default=50_000,
+                            help='number of voters, e.g. 50k, 1M or 10M (default 50k)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='random seed; the same seed gives the same file (default 0)')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1:
+            raise CommandError('--rows must be at least 1')
+
+        start = time.perf_counter()
+        try:
+            write_synthetic_csv(options['filename'], options['rows'], options['seed'])
+        except OSError as e:
+            raise CommandError(f'Could not write {options["filename"]}: {e}')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'Wrote {options["rows"]:,} voters to {options["filename"]} in {elapsed:.1f}s.')
@@ -0,0 +1,31 @@
+# file: voter_analytics/management/commands/import_voters.py
+# author: Cody Headings, codyh@bu.edu, 10/30/2025
+# desc: manage.py command to bulk load the Newton voter CSV file
+
+from django.core.management.base import BaseCommand, CommandError
+
+from voter_analytics.importer import DEFAULT_BATCH_SIZE, import_voters, import_voters_delta
+
+
+class Command(BaseCommand):
+    help = 'Load voter records from a CSV file, replacing (or with --delta, updating) the existing Voters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', help='path to the voter CSV file')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help=f'rows per bulk insert/transaction (default {DEFAULT_BATCH_SIZE})')
+        parser.add_argument('--delta', action='store_true',
+                            help='upsert changed rows by voter id instead of reloading the table')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        load = import_voters_delta if options['delta'] else import_voters
+        try:
+            stats = load(options['filename'], batch_size=batch_size)
+        except OSError as e:
+            raise CommandError(f'Could not read {options["filename"]}: {e}')
+
+        self.stdout.write(stats.summary())
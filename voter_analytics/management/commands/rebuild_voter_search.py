@@ -0,0 +1,18 @@
+# file: voter_analytics/management/commands/rebuild_voter_search.py
+# author: Cody Headings, codyh@bu.edu, 11/05/2025
+# desc: manage.py command to rebuild the voter name/address search index
+
+from django.core.management.base import BaseCommand
+
+from cs412.caching import invalidate
+from voter_analytics.models import VoterSearchTerm
+from voter_analytics.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the VoterSearchTerm name/address index from the Voter table.'
+
+    def handle(self, *args, **options):
+        terms = rebuild_search_index()
+        invalidate(VoterSearchTerm)
+        self.stdout.write(f'Rebuilt the voter search index with {terms} terms.')
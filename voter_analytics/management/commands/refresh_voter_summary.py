@@ -0,0 +1,20 @@
+# file: voter_analytics/management/commands/refresh_voter_summary.py
+# author: Cody Headings, codyh@bu.edu, 10/31/2025
+# desc: manage.py command to rebuild the voter summary tables
+
+from django.core.management.base import BaseCommand
+
+from cs412.caching import invalidate
+from voter_analytics.aggregates import refresh_precinct_rollups, refresh_voter_summary
+from voter_analytics.models import HouseholdSummary, PrecinctSummary, VoterSummary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed VoterSummary and precinct/household rollups from the Voter table.'
+
+    def handle(self, *args, **options):
+        cells = refresh_voter_summary()
+        precincts = refresh_precinct_rollups()
+        invalidate(VoterSummary, PrecinctSummary, HouseholdSummary)
+        self.stdout.write(f'Rebuilt VoterSummary with {cells} rows '
+                          f'and the rollups for {precincts} precincts.')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0004_voter_voter_id_row_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('party', models.CharField(max_length=2)),
+                ('voter_score', models.IntegerField()),
+                ('birth_year', models.IntegerField()),
+                ('elections', models.IntegerField()),
+                ('count', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('party', 'voter_score', 'birth_year', 'elections'), name='unique_voter_summary_cell')],
+            },
+        ),
+    ]
@@ -0,0 +1,113 @@
+# Store the election flags as booleans and dob/date_registered as dates,
+# converting existing rows, and add indexes for the list view filters.
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time
+
+ELECTIONS = ['v20state', 'v21town', 'v21primary', 'v22general', 'v23town']
+DATES = ['dob', 'date_registered']
+
+
+def forwards(apps, schema_editor):
+    '''Copy the old text flags and datetimes into the new typed columns.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    for e in ELECTIONS:
+        Voter.objects.filter(**{e: 'TRUE'}).update(**{f'{e}_new': True})
+    Voter.objects.update(**{f'{d}_new': TruncDate(d) for d in DATES})
+
+
+def backwards(apps, schema_editor):
+    '''Copy the typed columns back into the old text flags and datetimes.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    for e in ELECTIONS:
+        Voter.objects.update(**{e: Case(When(**{f'{e}_new': True}, then=Value('TRUE')),
+                                        default=Value('FALSE'))})
+
+    voters = Voter.objects.values_list('pk', *[f'{d}_new' for d in DATES])
+    batch = []
+    for pk, dob, registered in voters.iterator(chunk_size=5000):
+        batch.append(Voter(pk=pk,
+                           dob=timezone.make_aware(datetime.combine(dob, time())),
+                           date_registered=timezone.make_aware(datetime.combine(registered, time()))))
+        if len(batch) >= 5000:
+            Voter.objects.bulk_update(batch, DATES)
+            batch = []
+    Voter.objects.bulk_update(batch, DATES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0005_voter_summary'),
+    ]
+
+    operations = [
+        # let the old columns be re-added before they are refilled if this is reversed
+        *[migrations.AlterField(
+            model_name='voter',
+            name=e,
+            field=models.TextField(default='FALSE'),
+        ) for e in ELECTIONS],
+        *[migrations.AlterField(
+            model_name='voter',
+            name=d,
+            field=models.DateTimeField(null=True),
+        ) for d in DATES],
+        *[migrations.AddField(
+            model_name='voter',
+            name=f'{e}_new',
+            field=models.BooleanField(default=False),
+        ) for e in ELECTIONS],
+        *[migrations.AddField(
+            model_name='voter',
+            name=f'{d}_new',
+            field=models.DateField(null=True),
+        ) for d in DATES],
+
+        migrations.RunPython(forwards, backwards),
+
+        *[migrations.RemoveField(
+            model_name='voter',
+            name=name,
+        ) for name in ELECTIONS + DATES],
+        *[migrations.RenameField(
+            model_name='voter',
+            old_name=f'{name}_new',
+            new_name=name,
+        ) for name in ELECTIONS + DATES],
+        *[migrations.AlterField(
+            model_name='voter',
+            name=d,
+            field=models.DateField(),
+        ) for d in DATES],
+
+        migrations.AlterField(
+            model_name='voter',
+            name='address_zip',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='voter',
+            name='precinct',
+            field=models.CharField(db_index=True, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['dob', 'id'], name='voter_dob_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['party', 'dob'], name='voter_party_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['voter_score', 'dob'], name='voter_score_dob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voter',
+            index=models.Index(fields=['party', 'voter_score', 'dob'], name='voter_party_score_dob_idx'),
+        ),
+    ]
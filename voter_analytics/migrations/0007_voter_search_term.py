@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from voter_analytics.search import terms_for
+
+# the Voter columns indexed when this migration was written (see search.SEARCH_FIELDS)
+SEARCH_FIELDS = ['first_name', 'last_name', 'address_number', 'address_street']
+
+
+def forwards(apps, schema_editor):
+    '''Index the existing Voters, so search works without running rebuild_voter_search.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    VoterSearchTerm = apps.get_model('voter_analytics', 'VoterSearchTerm')
+    batch = []
+    rows = Voter.objects.order_by('pk').values_list('pk', *SEARCH_FIELDS)
+    for pk, *values in rows.iterator(chunk_size=5000):
+        batch.extend(VoterSearchTerm(term=term, voter_id=pk) for term in terms_for(*values))
+        if len(batch) >= 20000:
+            VoterSearchTerm.objects.bulk_create(batch, batch_size=5000)
+            batch = []
+    VoterSearchTerm.objects.bulk_create(batch, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0006_typed_voter_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoterSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('voter', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='search_terms', to='voter_analytics.voter')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'voter'], name='voter_search_term_idx')],
+            },
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,100 @@
+# Add the indexed household key to Voter, filling it in for existing rows,
+# and the precinct and household rollup tables, filled from existing rows.
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+from voter_analytics.models import household_key
+
+ADDRESS = ['address_number', 'address_street', 'address_apt_number', 'address_zip']
+
+# the election columns when this migration was written (see aggregates.ELECTIONS)
+ELECTIONS = ['v20state', 'v21town', 'v21primary', 'v22general', 'v23town']
+
+
+def forwards(apps, schema_editor):
+    '''Compute household_key for existing Voters in Python, so it matches what the importer stores.'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    quote = schema_editor.connection.ops.quote_name
+    sql = (f'UPDATE {quote(Voter._meta.db_table)} SET {quote("household_key")} = %s'
+           f' WHERE {quote("id")} = %s')
+    # read a batch, then write it: SQLite does not isolate a table being
+    # read from writes to it on the same connection
+    rows = Voter.objects.order_by('pk').values_list('pk', *ADDRESS)
+    last = 0
+    with schema_editor.connection.cursor() as cursor:
+        while batch := list(rows.filter(pk__gt=last)[:5000]):
+            cursor.executemany(sql, [(household_key(*address), pk) for pk, *address in batch])
+            last = batch[-1][0]
+
+
+def fill_rollups(apps, schema_editor):
+    '''Fill the rollup tables for existing Voters (see aggregates.refresh_precinct_rollups).'''
+    Voter = apps.get_model('voter_analytics', 'Voter')
+    PrecinctSummary = apps.get_model('voter_analytics', 'PrecinctSummary')
+    HouseholdSummary = apps.get_model('voter_analytics', 'HouseholdSummary')
+
+    parties = (Voter.objects.order_by()
+               .values('precinct', 'party')
+               .annotate(voters=Count('pk'),
+                         **{e: Count('pk', filter=Q(**{e: True})) for e in ELECTIONS}))
+    PrecinctSummary.objects.bulk_create(PrecinctSummary(**row) for row in parties)
+
+    households = Counter()
+    rows = (Voter.objects.order_by()
+            .values('precinct', 'household_key')
+            .annotate(size=Count('pk'))
+            .values_list('precinct', 'size'))
+    for precinct, size in rows.iterator(chunk_size=5000):
+        households[(precinct, size)] += 1
+    HouseholdSummary.objects.bulk_create(
+        HouseholdSummary(precinct=precinct, size=size, households=n)
+        for (precinct, size), n in households.items())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voter_analytics', '0007_voter_search_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voter',
+            name='household_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='HouseholdSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precinct', models.CharField(max_length=10)),
+                ('size', models.IntegerField()),
+                ('households', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('precinct', 'size'), name='unique_household_summary')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PrecinctSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precinct', models.CharField(max_length=10)),
+                ('party', models.CharField(max_length=2)),
+                ('voters', models.IntegerField()),
+                ('v20state', models.IntegerField()),
+                ('v21town', models.IntegerField()),
+                ('v21primary', models.IntegerField()),
+                ('v22general', models.IntegerField()),
+                ('v23town', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('precinct', 'party'), name='unique_precinct_summary')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
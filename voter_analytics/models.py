@@ -4,6 +4,10 @@
 
 from django.db import models
 
+def household_key(number, street, apt, zip_code):
+    '''Return the household key for an address: its parts trimmed, uppercased and joined by |.'''
+    return '|'.join(part.strip().upper() for part in (number, street, apt, zip_code))[:255]
+
 # Create your models here.
 class Voter(models.Model):
     '''
@@ -11,25 +15,41 @@ class Voter(models.Model):
     Name, address details, DOB, etc.
     '''
     # identification
+    voter_id = models.CharField(max_length=20, unique=True, null=True)
     first_name = models.TextField()
     last_name = models.TextField()
     address_number = models.TextField()
     address_street = models.TextField()
     address_apt_number = models.TextField()
-    address_zip = models.TextField()
-    dob = models.DateTimeField()
-    date_registered = models.DateTimeField()
+    address_zip = models.CharField(max_length=10)
+    dob = models.DateField()
+    date_registered = models.DateField()
     party = models.CharField(max_length=2)
-    precinct = models.TextField()
+    precinct = models.CharField(max_length=10, db_index=True)
 
     # voting info
-    v20state = models.TextField()
-    v21town = models.TextField()
-    v21primary = models.TextField()
-    v22general = models.TextField()
-    v23town = models.TextField()
+    v20state = models.BooleanField(default=False)
+    v21town = models.BooleanField(default=False)
+    v21primary = models.BooleanField(default=False)
+    v22general = models.BooleanField(default=False)
+    v23town = models.BooleanField(default=False)
     voter_score = models.IntegerField()
 
+    # hash of the CSV row this record was loaded from, used by delta imports
+    row_hash = models.CharField(max_length=40, blank=True)
+
+    # normalized address shared by everyone in the same household (see household_key())
+    household_key = models.CharField(max_length=255, blank=True, db_index=True)
+
+    class Meta:
+        # match the filter and sort paths of VoterListView (always ordered by dob)
+        indexes = [
+            models.Index(fields=['dob', 'id'], name='voter_dob_id_idx'),
+            models.Index(fields=['party', 'dob'], name='voter_party_dob_idx'),
+            models.Index(fields=['voter_score', 'dob'], name='voter_score_dob_idx'),
+            models.Index(fields=['party', 'voter_score', 'dob'], name='voter_party_score_dob_idx'),
+        ]
+
     def formatted_zip(self):
         if len(self.address_zip) == 8:
             return f"{self.address_zip[:4]}-{self.address_zip[4:]}"
@@ -39,41 +59,90 @@ class Voter(models.Model):
         '''Return a string representation of this model instance.'''
         return f'{self.first_name} {self.last_name}: {self.address_number} {self.address_street}, {self.party}'
     
-def load_data():
-    '''Function to load data records from CSV file into Django model instances.'''
+class VoterSummary(models.Model):
+    '''
+    Precomputed count of Voters sharing a party, voter score, birth year
+    and election-participation pattern. The graphs page reads these rows
+    instead of scanning the Voter table.
+    '''
+    party = models.CharField(max_length=2)
+    voter_score = models.IntegerField()
+    birth_year = models.IntegerField()
+    # bit i is set when the voters took part in ELECTIONS[i]
+    elections = models.IntegerField()
+    count = models.IntegerField()
 
-    # delete existing records to prevent duplicates:
-    Voter.objects.all().delete()
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['party', 'voter_score', 'birth_year', 'elections'],
+                                    name='unique_voter_summary_cell'),
+        ]
 
-    filename = 'C:/Users/green/Downloads/newton_voters.csv'
-    f = open(filename)
-    f.readline() # discard headers
- 
-    for line in f:
-        fields = line.split(',')
-
-        # create a new instance of Voter object with this record from CSV
-        try:
-            voter = Voter(last_name=fields[1],
-                            first_name=fields[2],
-                            address_number = fields[3],
-                            address_street = fields[4],
-                            address_apt_number = fields[5],
-                            address_zip = fields[6],
-                            dob = fields[7],
-                            date_registered =fields[8],
-                            party = fields[9],
-                            precinct = fields[10],
-                            v20state = fields[11],
-                            v21town = fields[12],
-                            v21primary = fields[13],
-                            v22general =fields[14],
-                            v23town = fields[15],
-                            voter_score = fields[16]
-                        )
-            voter.save() # commit to database
-            print(f'Created voter: {voter}')
-        except:
-            print(f"Skipped: {fields}")
-
-    print(f'Done. Created {len(Voter.objects.all())} Voters.')
\ No newline at end of file
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.party} score={self.voter_score} born {self.birth_year} elections={self.elections:05b}: {self.count}'
+
+class VoterSearchTerm(models.Model):
+    '''
+    One normalized word from a Voter's name or address. The (term, voter)
+    index makes prefix searches a range scan; see voter_analytics.search.
+    '''
+    term = models.CharField(max_length=40)
+    # the importer maintains these rows itself, so deleting Voters in bulk
+    # stays a single DELETE instead of a cascade
+    voter = models.ForeignKey(Voter, on_delete=models.DO_NOTHING, db_constraint=False,
+                              related_name='search_terms')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'voter'], name='voter_search_term_idx'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'{self.term} -> {self.voter_id}'
+
+class PrecinctSummary(models.Model):
+    '''
+    Precomputed number of Voters of one party in one precinct, and how
+    many of them took part in each election.
+    '''
+    precinct = models.CharField(max_length=10)
+    party = models.CharField(max_length=2)
+    voters = models.IntegerField()
+    v20state = models.IntegerField()
+    v21town = models.IntegerField()
+    v21primary = models.IntegerField()
+    v22general = models.IntegerField()
+    v23town = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['precinct', 'party'], name='unique_precinct_summary'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'precinct {self.precinct} {self.party}: {self.voters}'
+
+class HouseholdSummary(models.Model):
+    '''Precomputed number of households of each size in one precinct.'''
+    precinct = models.CharField(max_length=10)
+    size = models.IntegerField()
+    households = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['precinct', 'size'], name='unique_household_summary'),
+        ]
+
+    def __str__(self):
+        '''Return a string representation of this model instance.'''
+        return f'precinct {self.precinct}: {self.households} households of {self.size}'
+
+def load_data(filename='C:/Users/green/Downloads/newton_voters.csv'):
+    '''Function to load data records from CSV file into Django model instances.'''
+    from .importer import import_voters
+
+    stats = import_voters(filename)
+    print(stats.summary())
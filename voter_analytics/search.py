@@ -0,0 +1,90 @@
+# file: voter_analytics/search.py
+# author: Cody Headings, codyh@bu.edu, 11/05/2025
+# desc: prefix search over voter names and addresses, backed by VoterSearchTerm
+
+import re
+
+from django.db import transaction
+
+from .models import Voter, VoterSearchTerm
+
+# Voter columns whose words are indexed
+SEARCH_FIELDS = ['first_name', 'last_name', 'address_number', 'address_street']
+
+# ignore shorter prefixes; they match too much of the table to be useful
+MIN_PREFIX = 2
+
+# the largest string that sorts after every term starting with a prefix
+_PREFIX_END = '\uffff'
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    '''Split text into lowercase words, dropping punctuation (O'BRIEN -> obrien).'''
+    return _WORD.findall(text.lower().replace("'", ''))
+
+
+def terms_for(*values):
+    '''Return the set of index terms for a voter's searchable column values.'''
+    terms = set()
+    for value in values:
+        for word in tokenize(value or ''):
+            terms.add(word[:40])
+    return terms
+
+
+def index_voters(voters, batch_size=5000, replace=True):
+    '''
+    (Re)build the search terms of every Voter in a queryset, streaming
+    it in batches. Pass replace=False if the voters have no terms yet.
+    Returns the number of terms written.
+    '''
+    written = 0
+    rows = voters.values_list('pk', *SEARCH_FIELDS).iterator(chunk_size=batch_size)
+    batch = []
+    pks = []
+
+    def flush():
+        with transaction.atomic():
+            if replace:
+                VoterSearchTerm.objects.filter(voter_id__in=pks).delete()
+            VoterSearchTerm.objects.bulk_create(batch, batch_size=batch_size)
+
+    for pk, *values in rows:
+        pks.append(pk)
+        batch.extend(VoterSearchTerm(term=term, voter_id=pk) for term in terms_for(*values))
+        if len(pks) >= batch_size:
+            flush()
+            written += len(batch)
+            batch, pks = [], []
+    if pks:
+        flush()
+        written += len(batch)
+    return written
+
+
+def unindex_voters(pks):
+    '''Remove the search terms of the Voters with the given pks.'''
+    VoterSearchTerm.objects.filter(voter_id__in=pks).delete()
+
+
+def rebuild_search_index(batch_size=5000):
+    '''Rebuild the whole search index from the Voter table.'''
+    VoterSearchTerm.objects.all().delete()
+    return index_voters(Voter.objects.order_by('pk'), batch_size, replace=False)
+
+
+def search_voters(voters, query):
+    '''
+    Limit a Voter queryset to voters matching every word of query as a
+    prefix of one of their name or address words. Each word becomes an
+    index range scan on VoterSearchTerm.term.
+    '''
+    words = [w for w in tokenize(query) if len(w) >= MIN_PREFIX]
+    if not words:
+        return voters.none()
+    for word in words:
+        matches = VoterSearchTerm.objects.filter(term__gte=word, term__lt=word + _PREFIX_END)
+        voters = voters.filter(pk__in=matches.values('voter_id'))
+    return voters
@@ -0,0 +1,153 @@
+# file: voter_analytics/snapshot.py
+# author: Cody Headings, codyh@bu.edu, 11/06/2025
+# desc: optional in-memory NumPy snapshot of the voter counts for the graphs page
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from cs412.caching import data_version
+from .aggregates import ELECTIONS, summary_keys
+from .models import Voter, VoterSummary
+
+try:
+    import numpy as np
+except ImportError:  # the snapshot is optional; callers fall back to SQL
+    np = None
+
+# set VOTER_SNAPSHOT = False to always answer from the database
+SNAPSHOT_ENABLED = getattr(settings, 'VOTER_SNAPSHOT', True)
+
+# seconds a snapshot is trusted even if no invalidation was seen, in case
+# the voter tables were written by something that does not call invalidate()
+SNAPSHOT_MAX_AGE = getattr(settings, 'VOTER_SNAPSHOT_MAX_AGE', 300)
+
+logger = logging.getLogger(__name__)
+
+
+class VoterSnapshot:
+    '''
+    Read-only columns of (birth year, party code, voter score, election
+    bitmask, count), one entry per VoterSummary cell. Filtered counts are
+    weighted sums over boolean masks, so no database query is needed.
+    '''
+
+    def __init__(self, cells, version):
+        # cells: {(party, score, year, mask): count}
+        self.version = version
+        self.built = time.monotonic()
+        self.parties = sorted({party for party, _, _, _ in cells})
+        codes = {party: i for i, party in enumerate(self.parties)}
+
+        self.party = np.fromiter((codes[k[0]] for k in cells), np.uint8, len(cells))
+        self.voter_score = np.fromiter((k[1] for k in cells), np.int16, len(cells))
+        self.birth_year = np.fromiter((k[2] for k in cells), np.int16, len(cells))
+        self.elections = np.fromiter((k[3] for k in cells), np.uint8, len(cells))
+        self.count = np.fromiter(cells.values(), np.int64, len(cells))
+        for column in (self.party, self.voter_score, self.birth_year, self.elections, self.count):
+            column.flags.writeable = False
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    def is_current(self, version):
+        '''Return True if the snapshot was built from this data version and is not too old.'''
+        return self.version == version and time.monotonic() - self.built < SNAPSHOT_MAX_AGE
+
+    def select(self, party=None, voter_score=None, required=0, excluded=0,
+               min_year=None, max_year=None):
+        '''
+        Return a boolean mask of the cells matching the filters. required
+        and excluded are election bitmasks the voters must (not) match.
+        '''
+        keep = np.ones(len(self.count), dtype=bool)
+        if party:
+            if party not in self.parties:
+                return ~keep
+            keep &= self.party == self.parties.index(party)
+        if voter_score is not None:
+            keep &= self.voter_score == voter_score
+        if min_year is not None:
+            keep &= self.birth_year >= min_year
+        if max_year is not None:
+            keep &= self.birth_year <= max_year
+        if required:
+            keep &= (self.elections & required) == required
+        if excluded:
+            keep &= (self.elections & excluded) == 0
+        return keep
+
+    def graph_counts(self, **filters):
+        '''Return the same structure as aggregates.voter_graph_counts() for the filters.'''
+        keep = self.select(**filters)
+        n = self.count[keep]
+        years, year_index = np.unique(self.birth_year[keep], return_inverse=True)
+        by_year = np.bincount(year_index, weights=n, minlength=len(years))
+        by_party = np.bincount(self.party[keep], weights=n, minlength=len(self.parties))
+        masks = self.elections[keep]
+
+        return {
+            'total': int(n.sum()),
+            'years': {int(y): int(c) for y, c in zip(years, by_year)},
+            'parties': {p: int(c) for p, c in zip(self.parties, by_party) if c},
+            'elections': {e: int(n[(masks >> i) & 1 == 1].sum()) for i, e in enumerate(ELECTIONS)},
+        }
+
+
+def build_snapshot():
+    '''Build a VoterSnapshot from the VoterSummary table (or the Voter table if it is empty).'''
+    version = data_version(Voter, VoterSummary)
+    cells = {(party, score, year, mask): n for party, score, year, mask, n in
+             VoterSummary.objects.values_list('party', 'voter_score', 'birth_year',
+                                              'elections', 'count')}
+    if not cells:
+        cells = summary_keys(Voter.objects.all())
+    return VoterSnapshot(cells, version)
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    '''
+    Return the process-wide VoterSnapshot, rebuilding it first if the
+    voter data changed since it was built (the version tokens are shared
+    by every process, so an import run from manage.py counts) or it is
+    older than SNAPSHOT_MAX_AGE. Returns None if NumPy is not installed
+    or the snapshot is disabled.
+    '''
+    global _snapshot
+    if np is None or not SNAPSHOT_ENABLED:
+        return None
+
+    version = data_version(Voter, VoterSummary)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+
+    # one thread rebuilds; the others wait for it rather than all querying
+    with _lock:
+        if _snapshot is None or not _snapshot.is_current(version):
+            _snapshot = build_snapshot()
+        return _snapshot
+
+
+def preload_snapshot():
+    '''
+    Build the snapshot in a background thread, so a server process has it
+    before its first graphs request. Does nothing if the snapshot is off.
+    '''
+    if np is None or not SNAPSHOT_ENABLED:
+        return
+
+    def build():
+        try:
+            get_snapshot()
+        except DatabaseError:  # e.g. the voter tables are not migrated yet
+            logger.exception('Could not preload the voter snapshot')
+
+    threading.Thread(target=build, name='voter-snapshot', daemon=True).start()
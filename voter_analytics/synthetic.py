@@ -0,0 +1,114 @@
+# file: voter_analytics/synthetic.py
+# author: Cody Headings, codyh@bu.edu, 11/07/2025
+# desc: synthetic Newton-style voter CSV files for development and benchmarks
+
+import csv
+import random
+from datetime import date, timedelta
+
+from .aggregates import ELECTIONS
+
+# the header of the city's export, in the column order voter_from_row() reads
+HEADER = ['Voter ID Number', 'Last Name', 'First Name',
+          'Residential Address - Street Number', 'Residential Address - Street Name',
+          'Residential Address - Apartment Number', 'Residential Address - Zip Code',
+          'Date of Birth', 'Date of Registration', 'Party Affiliation', 'Precinct Number',
+          *ELECTIONS, 'voter_score']
+
+FIRST_NAMES = ['JAMES', 'MARY', 'JOHN', 'PATRICIA', 'ROBERT', 'JENNIFER', 'MICHAEL', 'LINDA',
+               'WILLIAM', 'ELIZABETH', 'DAVID', 'BARBARA', 'RICHARD', 'SUSAN', 'JOSEPH', 'JESSICA',
+               'THOMAS', 'SARAH', 'CHARLES', 'KAREN', 'DANIEL', 'NANCY', 'MATTHEW', 'LISA',
+               'ANTHONY', 'MARGARET', 'MARK', 'BETTY', 'STEVEN', 'EMILY', 'PAUL', 'ANNA',
+               'ANDREW', 'DOROTHY', 'JOSHUA', 'REBECCA', 'KEVIN', 'LAURA', 'BRIAN', 'RACHEL',
+               'GEORGE', 'SOPHIA', 'PETER', 'HANNAH', 'WEI', 'MEI', 'RAJ', 'PRIYA', 'DMITRI',
+               'OLGA', 'MIGUEL', 'LUCIA', 'SEAN', 'MAEVE', 'AARON', 'NOAH', 'ETHAN', 'OLIVIA']
+
+LAST_NAMES = ['SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'GARCIA', 'MILLER', 'DAVIS',
+              'RODRIGUEZ', 'MARTINEZ', 'HERNANDEZ', 'LOPEZ', 'GONZALEZ', 'WILSON', 'ANDERSON',
+              'THOMAS', 'TAYLOR', 'MOORE', 'JACKSON', 'MARTIN', 'LEE', 'PEREZ', 'THOMPSON',
+              'WHITE', 'HARRIS', 'CLARK', 'LEWIS', 'ROBINSON', 'WALKER', 'YOUNG', 'ALLEN',
+              "O'BRIEN", "O'CONNOR", 'MURPHY', 'SULLIVAN', 'KELLY', 'MCCARTHY', 'FITZGERALD',
+              'COHEN', 'GOLDBERG', 'SHAPIRO', 'KATZ', 'CHEN', 'WANG', 'ZHANG', 'LI', 'LIU',
+              'PATEL', 'SHAH', 'KIM', 'PARK', 'NGUYEN', 'ROSSI', 'RUSSO', 'FERRARO', 'SILVA',
+              'IVANOV', 'KOWALSKI', 'MULLER', 'DUBOIS', 'NAKAMURA', 'SATO', 'HADDAD', 'SMYTHE']
+
+STREETS = ['COMMONWEALTH AVE', 'WASHINGTON ST', 'BEACON ST', 'WALNUT ST', 'CENTRE ST',
+           'HOMER ST', 'LOWELL AVE', 'CHESTNUT ST', 'WALTHAM ST', 'WATERTOWN ST',
+           'BOYLSTON ST', 'DEDHAM ST', 'PARKER ST', 'CALIFORNIA ST', 'ADAMS ST', 'CABOT ST',
+           'AUBURN ST', 'ELLIOT ST', 'HIGHLAND ST', 'HAMMOND ST', 'WARD ST', 'LANGLEY RD',
+           'LAKE AVE', 'GROVE ST', 'SUMMER ST', 'VALENTINE ST', 'JACKSON RD', 'WOODWARD ST']
+
+# Newton zip codes, written without the leading zero as in the city's file
+ZIPS = ['2458', '2459', '2460', '2461', '2462', '2464', '2465', '2466', '2467', '2468']
+
+# party codes and their approximate share of registered voters
+PARTIES = [('U ', 52.0), ('D ', 35.0), ('R ', 10.0), ('L ', 0.6), ('J ', 0.4), ('CC', 0.3),
+           ('AA', 0.2), ('A ', 0.2), ('Q ', 0.2), ('S ', 0.1), ('FF', 0.1), ('T ', 0.1),
+           ('GG', 0.1), ('O ', 0.1), ('P ', 0.1), ('E ', 0.1), ('V ', 0.1), ('H ', 0.1),
+           ('EE', 0.05), ('K ', 0.05), ('W ', 0.05), ('X ', 0.05), ('Y ', 0.05), ('Z ', 0.05)]
+
+# fraction of an average voter who turned out in each election (same order as ELECTIONS)
+TURNOUT = [0.85, 0.30, 0.20, 0.60, 0.35]
+
+# wards 1-8, precincts A-D of each
+PRECINCTS = [f'{ward}{precinct}' for ward in range(1, 9) for precinct in 'ABCD']
+
+OLDEST = date(1920, 1, 1)
+YOUNGEST = date(2005, 10, 1)
+LAST_REGISTRATION = date(2023, 10, 1)
+
+
+def synthetic_rows(count, seed=0):
+    '''
+    Yield count CSV rows (lists of strings) of made-up voters. Ages,
+    parties and turnout roughly follow a real city's distributions, and
+    a voter's elections agree with their voter_score. The same seed
+    always produces the same rows.
+    '''
+    rng = random.Random(seed)
+    party_codes = [p for p, _ in PARTIES]
+    party_weights = [w for _, w in PARTIES]
+    age_span = (YOUNGEST - OLDEST).days
+
+    for n in range(count):
+        dob = OLDEST + timedelta(days=int(age_span * rng.random() ** 0.8))
+        adult = date(dob.year + 18, dob.month, min(dob.day, 28))
+        first_eligible = max(adult, date(1950, 1, 1))
+        registered = first_eligible + timedelta(
+            days=rng.randrange(max(1, (LAST_REGISTRATION - first_eligible).days)))
+
+        # older voters turn out more often
+        propensity = min(1.0, rng.betavariate(2.0, 1.5) * (0.6 + (2005 - dob.year) / 100))
+        voted = [rng.random() < rate * (0.3 + 1.2 * propensity) for rate in TURNOUT]
+
+        last_name = rng.choice(LAST_NAMES)
+        initials = last_name.replace("'", '')[:3]
+        yield [
+            f'{dob.year % 100:02d}{initials}{n:08d}',
+            last_name,
+            rng.choice(FIRST_NAMES),
+            str(rng.randint(1, 1200)),
+            rng.choice(STREETS),
+            rng.choice(['1', '2', '3', 'A', 'B', '2R']) if rng.random() < 0.25 else '',
+            rng.choice(ZIPS),
+            dob.isoformat(),
+            registered.isoformat(),
+            rng.choices(party_codes, party_weights)[0],
+            rng.choice(PRECINCTS),
+            *['TRUE' if v else 'FALSE' for v in voted],
+            str(sum(voted)),
+        ]
+
+
+def write_synthetic_csv(filename, count, seed=0, chunk_size=10_000):
+    '''Write a synthetic voter CSV file with count rows.'''
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        chunk = []
+        for row in synthetic_rows(count, seed):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                writer.writerows(chunk)
+                chunk = []
+        writer.writerows(chunk)
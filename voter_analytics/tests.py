@@ -1,3 +1,250 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from collections import Counter
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from cs412.pagination import KeysetPage, KeysetPaginator
+
+from .aggregates import (SummaryDelta, election_mask, facet_counts, refresh_voter_summary,
+                         summary_keys)
+from .importer import import_voters, import_voters_delta
+from .models import Voter, VoterSummary
+from .search import search_voters
+from .views import VoterListView
+
+# keep the tests' cached counts and version tokens out of the shared caches
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    'charts': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-charts'},
+}
+
+HEADER = ['Voter ID Number', 'Last Name', 'First Name', 'Residential Address - Street Number',
+          'Residential Address - Street Name', 'Residential Address - Apartment Number',
+          'Residential Address - Zip Code', 'Date of Birth', 'Date of Registration',
+          'Party Affiliation', 'Precinct Number', 'v20state', 'v21town', 'v21primary',
+          'v22general', 'v23town', 'voter_score']
+
+
+def voter_row(voter_id, last_name='SMITH', first_name='ANN', party='D ', dob='1980-05-01',
+              flags=(True, False, False, True, False), number='10', street='WALNUT ST'):
+    '''Return one row of the voter CSV file.'''
+    return [voter_id, last_name, first_name, number, street, '', '02458', dob, '2000-01-01',
+            party, '1', *['TRUE' if flag else 'FALSE' for flag in flags], str(sum(flags))]
+
+
+class VoterFileMixin:
+    '''Write voter CSV files to a temporary directory.'''
+
+    def write_voters(self, rows):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(rows)
+        return path
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DeltaImportTests(VoterFileMixin, TestCase):
+    '''import_voters_delta() matches rows on voter_id and only writes what changed.'''
+
+    def setUp(self):
+        import_voters(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2', last_name='JONES'),
+            voter_row('V3', last_name='BROWN'),
+        ]))
+        self.pks = dict(Voter.objects.values_list('voter_id', 'pk'))
+
+    def test_inserts_updates_and_deletes(self):
+        stats = import_voters_delta(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2', last_name='JONES', party='R '),
+            voter_row('V4', last_name='GREEN'),
+        ]))
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted, stats.unchanged),
+                         (1, 1, 1, 1))
+        self.assertEqual(sorted(Voter.objects.values_list('voter_id', flat=True)),
+                         ['V1', 'V2', 'V4'])
+
+        # the changed row is upserted in place, keeping its pk
+        v2 = Voter.objects.get(voter_id='V2')
+        self.assertEqual(v2.pk, self.pks['V2'])
+        self.assertEqual(v2.party, 'R ')
+        self.assertEqual(Voter.objects.get(voter_id='V1').pk, self.pks['V1'])
+
+    def test_unchanged_file_writes_nothing(self):
+        stats = import_voters_delta(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2', last_name='JONES'),
+            voter_row('V3', last_name='BROWN'),
+        ]))
+        self.assertEqual((stats.inserted, stats.updated, stats.deleted, stats.unchanged),
+                         (0, 0, 0, 3))
+        self.assertEqual(dict(Voter.objects.values_list('voter_id', 'pk')), self.pks)
+
+    def test_search_index_follows_changes(self):
+        import_voters_delta(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2', last_name='JOHNSON'),
+            voter_row('V4', last_name='GREEN'),
+        ]))
+        found = lambda query: sorted(search_voters(Voter.objects.all(), query)
+                                     .values_list('voter_id', flat=True))
+        self.assertEqual(found('johnson'), ['V2'])
+        self.assertEqual(found('jones'), [])
+        self.assertEqual(found('brown'), [])
+        self.assertEqual(found('green'), ['V4'])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SummaryDeltaTests(VoterFileMixin, TestCase):
+    '''SummaryDelta patches only the VoterSummary cells a change touches.'''
+
+    def summary(self):
+        return {(party, score, year, mask): n for party, score, year, mask, n in
+                VoterSummary.objects.values_list('party', 'voter_score', 'birth_year',
+                                                 'elections', 'count')}
+
+    def test_delta_import_matches_a_rebuild(self):
+        import_voters(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2', dob='1990-01-01'),
+            voter_row('V3', party='R ', flags=(False,) * 5),
+            voter_row('V4', party='R ', flags=(False,) * 5),
+        ]))
+        import_voters_delta(self.write_voters([
+            voter_row('V1', flags=(True,) * 5),             # moves to another cell
+            voter_row('V2', dob='1990-01-01'),              # unchanged
+            voter_row('V3', party='R ', flags=(False,) * 5),
+            voter_row('V5', party='U ', dob='2001-07-04'),  # a new cell
+        ]))                                                 # V4 leaves its cell with one voter
+        patched = self.summary()
+
+        self.assertEqual(patched, dict(summary_keys(Voter.objects.all())))
+        refresh_voter_summary()
+        self.assertEqual(patched, self.summary())
+
+    def test_emptied_cells_are_deleted(self):
+        import_voters(self.write_voters([
+            voter_row('V1'),
+            voter_row('V2'),
+            voter_row('V3', party='R '),
+        ]))
+        delta = SummaryDelta()
+        delta.remove(Voter.objects.filter(voter_id__in=['V1', 'V3']))
+        delta.apply()
+
+        self.assertEqual(list(VoterSummary.objects.values_list('party', 'count')), [('D ', 1)])
+        self.assertFalse(delta.changes)
+
+
+class FacetCountsTests(SimpleTestCase):
+    '''Each option counts the voters the search would return with it selected.'''
+
+    # (party, voter score, elections mask) -> voters; the elections are
+    # v20state, v21town, v21primary, v22general, v23town
+    cells = Counter({
+        ('D ', 2, election_mask([1, 0, 0, 1, 0])): 5,
+        ('D ', 1, election_mask([1, 0, 0, 0, 0])): 3,
+        ('R ', 2, election_mask([1, 1, 0, 1, 0])): 4,
+        ('R ', 0, election_mask([0, 0, 0, 0, 0])): 7,
+        ('U ', 2, election_mask([1, 0, 0, 1, 1])): 2,
+    })
+
+    def test_no_filters(self):
+        self.assertEqual(facet_counts(self.cells), {
+            'party': {'D ': 8, 'R ': 11, 'U ': 2},
+            'vscore': {2: 11, 1: 3, 0: 7},
+            'elections': {'v20state': 14, 'v21town': 4, 'v21primary': 0, 'v22general': 11, 'v23town': 2},
+        })
+
+    def test_party_and_score_ignore_their_own_filter(self):
+        self.assertEqual(facet_counts(self.cells, party='D ', voter_score=2), {
+            'party': {'D ': 5, 'R ': 4, 'U ': 2},    # voter score 2, any party
+            'vscore': {2: 5, 1: 3},                  # party D, any score
+            'elections': {'v20state': 5, 'v21town': 0, 'v21primary': 0, 'v22general': 5, 'v23town': 0},
+        })
+
+    def test_required_and_excluded_elections(self):
+        counts = facet_counts(self.cells, required=election_mask([1, 0, 0, 0, 0]),
+                              excluded=election_mask([0, 0, 0, 0, 1]))
+        self.assertEqual(counts, {
+            'party': {'D ': 8, 'R ': 4},
+            'vscore': {2: 9, 1: 3},
+            'elections': {'v20state': 12, 'v21town': 4, 'v21primary': 0, 'v22general': 9, 'v23town': 0},
+        })
+
+    def test_excluded_election_with_party(self):
+        self.assertEqual(facet_counts(self.cells, party='R ', excluded=election_mask([0, 0, 0, 1, 0])), {
+            'party': {'D ': 3, 'R ': 7},
+            'vscore': {0: 7},
+            'elections': {'v20state': 0, 'v21town': 0, 'v21primary': 0, 'v22general': 0, 'v23town': 0},
+        })
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class KeysetPaginationTests(TestCase):
+    '''KeysetPaginator walks a (dob, id) ordering with ties both ways.'''
+
+    def setUp(self):
+        # five birthdays shared by 23 voters, so pages split runs of equal dob
+        Voter.objects.bulk_create(
+            Voter(voter_id=f'V{i}', first_name='ANN', last_name='SMITH', address_number='1',
+                  address_street='WALNUT ST', address_apt_number='', address_zip='02458',
+                  dob=date(1950 + i % 5, 1, 1), date_registered=date(2000, 1, 1),
+                  party='D ', precinct='1', voter_score=0)
+            for i in range(23))
+        self.ordered = list(Voter.objects.order_by('dob', 'id'))
+        self.paginator = KeysetPaginator(Voter.objects.all(), 5, ordering=('dob', 'id'))
+
+    def walk_forward(self):
+        page = self.paginator.page()
+        pages = [page]
+        while page.has_next():
+            page = self.paginator.page(page.next_cursor)
+            pages.append(page)
+        return pages
+
+    def test_next_cursors_visit_every_row_once(self):
+        pages = self.walk_forward()
+        self.assertEqual([p.number for p in pages], [1, 2, 3, 4, 5])
+        self.assertEqual([v for p in pages for v in p], self.ordered)
+        self.assertFalse(pages[0].has_previous())
+        self.assertIsNone(pages[-1].next_cursor)
+        self.assertEqual(len(pages[-1]), 3)
+
+    def test_previous_cursors_return_the_same_pages(self):
+        forward = self.walk_forward()
+        page = forward[-1]
+        backward = [page]
+        while page.has_previous():
+            page = self.paginator.page(page.previous_cursor)
+            backward.append(page)
+        backward.reverse()
+
+        self.assertEqual([list(p) for p in backward], [list(p) for p in forward])
+        self.assertEqual([p.number for p in backward], [1, 2, 3, 4, 5])
+        self.assertTrue(backward[0].has_next())
+
+    def test_invalid_cursor_is_not_found(self):
+        with self.assertRaises(Http404):
+            self.paginator.page('not-a-cursor')
+
+    @mock.patch.object(VoterListView, 'paginate_by', 5)
+    def test_list_view_follows_cursor_links(self):
+        response = self.client.get(reverse('voters'))
+        self.assertIsInstance(response.context['page_obj'], KeysetPage)
+        seen = list(response.context['voters'])
+        while 'next_url' in response.context:
+            response = self.client.get(reverse('voters') + response.context['next_url'])
+            seen.extend(response.context['voters'])
+        self.assertEqual(seen, self.ordered)
+        self.assertEqual(response.context['page_obj'].number, 5)
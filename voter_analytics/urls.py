@@ -9,4 +9,8 @@ urlpatterns = [
     path('', VoterListView.as_view(), name='voters'),
     path('voter/<int:pk>', VoterDetailView.as_view(), name='voter'),
     path('graphs', VoterGraphsView.as_view(), name='graphs'),
+    path('graphs/histogram', VoterHistogramView.as_view(), name='histogram'),
+    path('export', VoterExportView.as_view(), name='export'),
+    path('precincts', PrecinctRollupView.as_view(), name='precincts'),
+    path('search/autocomplete', VoterAutocompleteView.as_view(), name='autocomplete'),
 ]
\ No newline at end of file
@@ -2,21 +2,47 @@
 # author: Cody Headings, codyh@bu.edu, 10/30/2025
 # desc: view functions to return html renders
 
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.views.generic import ListView, DetailView
-from . models import Voter
-from datetime import date
-import plotly
+from django.urls import reverse
+from django.views.generic import ListView, DetailView, View
+from django.utils.functional import cached_property
+from . models import HouseholdSummary, PrecinctSummary, Voter, VoterSearchTerm, VoterSummary
+from .aggregates import ELECTIONS, precinct_rollups
+from .filters import VoterFilter
+from .search import MIN_PREFIX
+from cs412.pagination import CachedCountPaginator, KeysetPage, KeysetPaginator
+from cs412.caching import cached
+from cs412.charts import cached_figure
 import plotly.graph_objs as go
+import csv
 
 # Create your views here.
-class VoterListView(ListView):
+class VoterFilterMixin:
+    '''Filter the Voter queryset by the search form in the query string.'''
+
+    def get_queryset(self):
+        """Limit the queryset."""
+        # start with entire queryset
+        voters = super().get_queryset().order_by('dob', 'id')
+
+        # filter results by the search form fields
+        return self.voter_filter.apply(voters)
+
+    @cached_property
+    def voter_filter(self):
+        """The validated search form filters for this request."""
+        return VoterFilter(self.request.GET)
+
+class VoterListView(VoterFilterMixin, ListView):
     '''View to display list of voter info'''
  
     template_name = 'voter_analytics/voters.html'
     model = Voter
     context_object_name = 'voters'
     paginate_by = 100
+    paginator_class = CachedCountPaginator
 
     def get_context_data(self, **kwargs):
         """Add variables to context data for view."""
@@ -24,61 +50,45 @@ class VoterListView(ListView):
         context["get_request"] = self.request.GET
         years = range(1910, 2011)
         context["years"] = years
+        context['facets'] = self.voter_filter.facet_options()
+
+        # navigation links keep the active filters in the query string
+        page = context['page_obj']
+        if page is not None:
+            if isinstance(page, KeysetPage):
+                if page.has_previous():
+                    context['previous_url'] = self.page_url(cursor=page.previous_cursor)
+                if page.has_next():
+                    context['next_url'] = self.page_url(cursor=page.next_cursor)
+            else:
+                if page.has_previous():
+                    context['previous_url'] = self.page_url(page=page.previous_page_number())
+                if page.has_next():
+                    context['next_url'] = self.page_url(page=page.next_page_number())
+
+        context['export_csv_url'] = reverse('export') + self.page_url(format='csv')
+        context['export_ndjson_url'] = reverse('export') + self.page_url(format='ndjson')
         return context
-    
-    def get_queryset(self):
-        """Limit the queryset."""
-        # start with entire queryset
-        voters = super().get_queryset().order_by('dob')
-
-        # filter results by these field(s):
-        if 'party' in self.request.GET:
-            party = self.request.GET['party']
-            if party:
-                voters = voters.filter(party=party)
-        
-        if 'vscore' in self.request.GET:
-            voter_score = self.request.GET['vscore']
-            if voter_score:
-                voters = voters.filter(voter_score=voter_score)
-
-        if 'v20state' in self.request.GET:
-            v20state = self.request.GET['v20state']
-            if v20state:
-                voters = voters.filter(v20state=v20state)
-
-        if 'v21town' in self.request.GET:
-            v21town = self.request.GET['v21town']
-            if v21town:
-                voters = voters.filter(v21town=v21town)
-
-        if 'v21primary' in self.request.GET:
-            v21primary = self.request.GET['v21primary']
-            if v21primary:
-                voters = voters.filter(v21primary=v21primary)
-
-        if 'v22general' in self.request.GET:
-            v22general = self.request.GET['v22general']
-            if v22general:
-                voters = voters.filter(v22general=v22general)
-
-        if 'v23town' in self.request.GET:
-            v23town = self.request.GET['v23town']
-            if v23town:
-                voters = voters.filter(v23town=v23town)
-
-        if 'min_dob' in self.request.GET:
-            min_dob = self.request.GET['min_dob']
-            if min_dob:
-                voters = voters.filter(dob__gte=date(int(min_dob),1,1))
-
-        if 'max_dob' in self.request.GET:
-            max_dob = self.request.GET['max_dob']
-            if max_dob:
-                voters = voters.filter(dob__lte=date(int(max_dob),12,31))
-                
-        return voters
 
+    def paginate_queryset(self, queryset, page_size):
+        """Seek by (dob, id) cursors; numbered ?page= links still use OFFSET."""
+        if 'page' in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        # the total is shared with the graphs page through the filter cache
+        paginator = KeysetPaginator(queryset, page_size, ordering=('dob', 'id'),
+                                    count=self.voter_filter.count())
+        page = paginator.page(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def page_url(self, **params):
+        """Return a link to another page with the same filters."""
+        query = self.request.GET.copy()
+        query.pop('cursor', None)
+        query.pop('page', None)
+        query.update(params)
+        return f'?{query.urlencode()}'
+    
 class VoterDetailView(DetailView):
     """View to display a single voter record."""
 
@@ -86,7 +96,21 @@ class VoterDetailView(DetailView):
     model = Voter
     context_object_name = "voter"
 
-class VoterGraphsView(ListView):
+    # most other household members listed on the page
+    household_limit = 20
+
+    def get_context_data(self, **kwargs):
+        """Add the other voters registered at the same address."""
+        context = super().get_context_data(**kwargs)
+        voter = self.object
+        context['household'] = []
+        if voter.household_key:
+            context['household'] = (Voter.objects.filter(household_key=voter.household_key)
+                                    .exclude(pk=voter.pk)
+                                    .order_by('last_name', 'first_name')[:self.household_limit])
+        return context
+
+class VoterGraphsView(VoterFilterMixin, ListView):
     """View to display graphs of voter data."""
 
     template_name = 'voter_analytics/graphs.html'
@@ -95,138 +119,137 @@ class VoterGraphsView(ListView):
 
     def get_context_data(self, **kwargs):
         """Method to add data to context of view."""
-        context = super().get_context_data(**kwargs)
-        voters = self.get_queryset()
-
         context = super().get_context_data(**kwargs)
         context["get_request"] = self.request.GET
         years = range(1910, 2011)
         context["years"] = years
 
-        year_counts = {}
-        for v in voters:
-            year = v.dob.year
-            if year in year_counts:
-                year_counts[year] += 1
-            else:
-                year_counts[year] = 1
-
-        years_sorted = sorted(year_counts.items())
-        x_years = [year for year, _ in years_sorted]
-        y_counts = [count for _, count in years_sorted]
-
-        fig_dob = go.Bar(x=x_years, y=y_counts)
-        graph_div_dob = plotly.offline.plot(
-            {"data": [fig_dob],
-             "layout_title_text": f"Voters by Year of Birth (n={voters.count()})"},
-            auto_open=False,
-            output_type="div"
-        )
-        context['graph_div_dob'] = graph_div_dob
-
-        party_counts = {}
-        for v in voters:
-            party = v.party
-            if party in party_counts:
-                party_counts[party] += 1
-            else:
-                party_counts[party] = 1
-
-        fig_party = go.Pie(
-            labels=list(party_counts.keys()),
-            values=list(party_counts.values())
-        )
-        graph_div_party = plotly.offline.plot(
-            {"data": [fig_party],
-             "layout_title_text": f"Voters by Party Affiliation (n={voters.count()})"},
-            auto_open=False,
-            output_type="div"
-        )
-        context['graph_div_party'] = graph_div_party
-
-        elections = {
-            "v20state": 0,
-            "v21town": 0,
-            "v21primary": 0,
-            "v22general": 0,
-            "v23town": 0,
-        }
-
-        for v in voters:
-            if v.v20state == "TRUE":
-                elections["v20state"] += 1
-            if v.v21town == "TRUE":
-                elections["v21town"] += 1
-            if v.v21primary == "TRUE":
-                elections["v21primary"] += 1
-            if v.v22general == "TRUE":
-                elections["v22general"] += 1
-            if v.v23town == "TRUE":
-                elections["v23town"] += 1
-
-        fig_elect = go.Bar(
-            x=list(elections.keys()),
-            y=list(elections.values())
-        )
-        graph_div_elect = plotly.offline.plot(
-            {"data": [fig_elect],
-             "layout_title_text": f"Voter Participation in Elections (n={voters.count()})"},
-            auto_open=False,
-            output_type="div"
-        )
-        context['graph_div_elect'] = graph_div_elect
+        # counts come from the VoterSummary table (or one grouped query),
+        # cached per filter combination
+        counts = self.voter_filter.graph_counts()
+        n = counts['total']
+
+        # figures are only built when the rendered chart is not cached
+        context['graph_div_dob'] = self.render_chart('dob', lambda: {
+            "data": [go.Bar(x=list(counts['years'].keys()),
+                            y=list(counts['years'].values()))],
+            "layout_title_text": f"Voters by Year of Birth (n={n})"})
+
+        context['graph_div_party'] = self.render_chart('party', lambda: {
+            "data": [go.Pie(labels=list(counts['parties'].keys()),
+                            values=list(counts['parties'].values()))],
+            "layout_title_text": f"Voters by Party Affiliation (n={n})"})
+
+        context['graph_div_elect'] = self.render_chart('elect', lambda: {
+            "data": [go.Bar(x=list(counts['elections'].keys()),
+                            y=list(counts['elections'].values()))],
+            "layout_title_text": f"Voter Participation in Elections (n={n})"})
 
         return context
-    
+
+    def render_chart(self, name, build):
+        """Return the HTML for one chart, cached per filter combination."""
+        return cached_figure(f'voter_graphs:{name}', self.voter_filter.key(),
+                             [Voter, VoterSummary, VoterSearchTerm], build)
+
+class VoterHistogramView(VoterFilterMixin, View):
+    """Return the graphs page counts for the search form filters as JSON."""
+
+    def get(self, request, *args, **kwargs):
+        """Respond with {"total", "years", "parties", "elections"} for the filters."""
+        return JsonResponse(self.voter_filter.graph_counts())
+
+
+class PrecinctRollupView(View):
+    """Return turnout, party and household rollups per precinct as JSON."""
+
+    cache_ttl = 600
+
+    def get(self, request, *args, **kwargs):
+        """Respond with {"elections": [...], "precincts": [...]}; ?precinct= selects one."""
+        precinct = request.GET.get('precinct') or None
+        data = cached('voters:precincts', precinct, [PrecinctSummary, HouseholdSummary],
+                      lambda: {'elections': ELECTIONS, 'precincts': precinct_rollups(precinct)},
+                      self.cache_ttl)
+        return JsonResponse(data)
+
+
+class Echo:
+    """A file-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+class VoterExportView(VoterFilterMixin, View):
+    """Stream the filtered voters as a CSV or NDJSON download."""
+
+    # columns written to the export, in order
+    fields = ['voter_id', 'last_name', 'first_name', 'address_number', 'address_street',
+              'address_apt_number', 'address_zip', 'dob', 'date_registered', 'party',
+              'precinct', 'v20state', 'v21town', 'v21primary', 'v22general', 'v23town',
+              'voter_score']
+
+    # rows fetched from the database per round trip
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        """Return a StreamingHttpResponse; memory use does not grow with the export."""
+        export_format = request.GET.get('format', 'csv')
+        if export_format == 'csv':
+            rows = self.csv_rows()
+            content_type = 'text/csv'
+        elif export_format == 'ndjson':
+            rows = self.ndjson_rows()
+            content_type = 'application/x-ndjson'
+        else:
+            return HttpResponseBadRequest('format must be csv or ndjson')
+
+        response = StreamingHttpResponse(rows, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="voters.{export_format}"'
+        return response
+
     def get_queryset(self):
         """Limit the queryset."""
-        # start with entire queryset
-        voters = super().get_queryset().order_by('dob')
-
-        # filter results by these field(s):
-        if 'party' in self.request.GET:
-            party = self.request.GET['party']
-            if party:
-                voters = voters.filter(party=party)
-        
-        if 'vscore' in self.request.GET:
-            voter_score = self.request.GET['vscore']
-            if voter_score:
-                voters = voters.filter(voter_score=voter_score)
-
-        if 'v20state' in self.request.GET:
-            v20state = self.request.GET['v20state']
-            if v20state:
-                voters = voters.filter(v20state=v20state)
-
-        if 'v21town' in self.request.GET:
-            v21town = self.request.GET['v21town']
-            if v21town:
-                voters = voters.filter(v21town=v21town)
-
-        if 'v21primary' in self.request.GET:
-            v21primary = self.request.GET['v21primary']
-            if v21primary:
-                voters = voters.filter(v21primary=v21primary)
-
-        if 'v22general' in self.request.GET:
-            v22general = self.request.GET['v22general']
-            if v22general:
-                voters = voters.filter(v22general=v22general)
-
-        if 'v23town' in self.request.GET:
-            v23town = self.request.GET['v23town']
-            if v23town:
-                voters = voters.filter(v23town=v23town)
-
-        if 'min_dob' in self.request.GET:
-            min_dob = self.request.GET['min_dob']
-            if min_dob:
-                voters = voters.filter(dob__gte=date(int(min_dob),1,1))
-
-        if 'max_dob' in self.request.GET:
-            max_dob = self.request.GET['max_dob']
-            if max_dob:
-                voters = voters.filter(dob__lte=date(int(max_dob),12,31))
-                
-        return voters
\ No newline at end of file
+        voters = Voter.objects.order_by('dob', 'id')
+        return self.voter_filter.apply(voters)
+
+    def rows(self):
+        """Iterate over the matching voters as tuples, chunk_size rows at a time."""
+        # .iterator() uses a server-side cursor where the database supports one
+        return self.get_queryset().values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+
+    def csv_rows(self):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.fields)
+        for row in self.rows():
+            yield writer.writerow(row)
+
+    def ndjson_rows(self):
+        encoder = DjangoJSONEncoder()
+        for row in self.rows():
+            yield encoder.encode(dict(zip(self.fields, row))) + '\n'
+
+class VoterAutocompleteView(VoterFilterMixin, View):
+    """Return the first few voters matching a name/address prefix as JSON."""
+
+    # most suggestions returned per request
+    limit = 10
+
+    def get(self, request, *args, **kwargs):
+        """Respond with {"results": [...]}; q must have at least MIN_PREFIX characters."""
+        query = request.GET.get('q', '').strip()
+        if len(query) < MIN_PREFIX:
+            return JsonResponse({'results': []})
+
+        voters = self.get_queryset().order_by('last_name', 'first_name', 'id')[:self.limit]
+        results = [{
+            'id': v.pk,
+            'name': f'{v.first_name} {v.last_name}',
+            'address': f'{v.address_number} {v.address_street}',
+            'url': reverse('voter', kwargs={'pk': v.pk}),
+        } for v in voters.only('first_name', 'last_name', 'address_number', 'address_street')]
+        return JsonResponse({'results': results})
+
+    def get_queryset(self):
+        """Limit the queryset."""
+        return self.voter_filter.apply(Voter.objects.all())